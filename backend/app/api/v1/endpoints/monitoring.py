@@ -2,7 +2,6 @@ from app.models.monitoring import MonitoringRecord
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 import logging
 import time
 import httpx
@@ -100,9 +99,7 @@ async def collect_server_metrics(
     try:
         # 检查服务器是否存在
         server_service = ServerService(db)
-        stmt = select(Server).where(Server.id == server_id)
-        result = await db.execute(stmt)
-        server = result.scalar_one_or_none()
+        server = await db.get(Server, server_id)
         if not server:
             raise HTTPException(status_code=404, detail="服务器不存在")
         
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from typing import Literal
@@ -435,15 +435,24 @@ async def create_server(
 
 @router.get("/", response_model=List[ServerResponse])
 async def get_servers(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     group_id: Optional[int] = Query(None, description="筛选指定分组的服务器"),
+    cursor: Optional[int] = Query(None, description="游标分页：返回ID大于该值的服务器，指定时忽略skip"),
     db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """获取服务器列表"""
     server_service = ServerService(db)
-    return await server_service.get_servers_async(skip=skip, limit=limit, group_id=group_id)
+    if cursor is None:
+        return await server_service.get_servers_async(skip=skip, limit=limit, group_id=group_id)
+    
+    servers = await server_service.get_servers_after_async(last_id=cursor, limit=limit, group_id=group_id)
+    # 本页已满时通过响应头返回下一页游标，响应体保持列表格式不变
+    if servers and len(servers) == limit:
+        response.headers["X-Next-Cursor"] = str(servers[-1].id)
+    return servers
 
 # ==========================================
 # 4. 动态ID路由 (必须放在最后)
@@ -64,6 +64,12 @@ class Settings(BaseSettings):
     # 调整考虑因素: 开启会增加少量开销但提高稳定性，关闭可减少开销但可能遇到失效连接
     DATABASE_POOL_PRE_PING: bool = True  # 数据库连接前检测有效性
     
+    # DATABASE_POOL_USE_LIFO: 连接池是否按后进先出方式复用连接
+    # 建议配置范围: True/False
+    # 调整考虑因素: 开启后优先复用最近使用的连接，负载较低时多余的空闲连接可被 pool_recycle 回收
+    # 注意：SQLite在异步模式下使用NullPool，不支持设置连接池参数，此配置仅适用于MySQL/PostgreSQL
+    DATABASE_POOL_USE_LIFO: bool = True  # 连接池后进先出复用
+    
     # DATABASE_ECHO: 是否显示SQL语句，用于调试
     # 建议配置范围: False (生产环境), True (开发环境)
     # 调整考虑因素: 开启有助于调试但会产生大量日志输出，生产环境建议关闭
@@ -129,6 +135,21 @@ class Settings(BaseSettings):
     # 调整考虑因素: 进程池大小应根据CPU核心数调整，适当增加可提高并发处理能力
     IPMI_PROCESS_POOL_SIZE: int = 6  # IPMI进程池大小
     
+    # IPMI_POLL_PROCESS_POOL_SIZE: 电源状态轮询常驻进程池大小，子进程不回收以复用IPMI会话
+    # 建议配置范围: 4-16 (即同时执行的批量轮询桶数，不应大于 SCHEDULER_IPMI_CONCURRENCY_LIMIT)
+    # 调整考虑因素: 每个子进程各自缓存会话，进程越多缓存命中率越低，但并行度越高
+    IPMI_POLL_PROCESS_POOL_SIZE: int = 6  # 电源状态轮询进程池大小
+    
+    # IPMI_SESSION_CACHE_TTL: 轮询进程内IPMI会话缓存时间(秒)
+    # 建议配置范围: 60-1800
+    # 调整考虑因素: 过长可能复用已被BMC清理的会话(失败后会自动重建)，过短则频繁重新认证
+    IPMI_SESSION_CACHE_TTL: int = 600  # IPMI会话缓存时间(秒)
+    
+    # IPMI_BULK_POLL_SIZE: 批量电源状态轮询时，单个子进程处理的最大主机数
+    # 建议配置范围: 4-16 (同一凭据的服务器会按此大小分桶)
+    # 调整考虑因素: 过大时单个桶串行耗时变长，过小则无法摊薄进程创建开销
+    IPMI_BULK_POLL_SIZE: int = 8  # 批量轮询分桶大小
+    
     # IPMI_DEFAULT_PORT: IPMI默认端口号
     # 建议配置范围: 623 (标准IPMI端口)
     # 调整考虑因素: 更改为非标准端口需确保所有服务器配置一致
@@ -195,6 +216,11 @@ class Settings(BaseSettings):
     # 调整考虑因素: 关闭验证会带来安全风险，但在测试环境中可以绕过自签名证书问题
     REDFISH_VERIFY_SSL: bool = False  # Redfish SSL证书验证
     
+    # REDFISH_KEEPALIVE_EXPIRY: Redfish HTTP空闲连接保持时间(秒)
+    # 建议配置范围: 10-60
+    # 调整考虑因素: 共享HTTP客户端复用同一BMC的TCP/TLS连接，过长会占用BMC有限的连接数
+    REDFISH_KEEPALIVE_EXPIRY: int = 30  # Redfish HTTP空闲连接保持时间(秒)
+    
     # 定时任务配置
     
     # POWER_STATE_REFRESH_INTERVAL: 电源状态刷新间隔（分钟）
@@ -212,6 +238,22 @@ class Settings(BaseSettings):
     # 调整考虑因素: 增加并发限制以提高任务执行效率；与数据库连接池大小协调，避免数据库成为瓶颈
     SCHEDULER_CONCURRENCY_LIMIT: int = 15  # 定时任务并发限制
     
+    # SCHEDULER_IPMI_CONCURRENCY_LIMIT: 定时任务IPMI查询并发限制
+    # 建议配置范围: 15-100 (不小于 IPMI_POLL_PROCESS_POOL_SIZE，超出部分只用于并发的UDP探测)
+    # 调整考虑因素: 仅限制同时进行的IPMI查询数，不占用数据库连接，可大于 SCHEDULER_CONCURRENCY_LIMIT；
+    # 实际同时执行的批量轮询数受轮询进程池大小限制
+    SCHEDULER_IPMI_CONCURRENCY_LIMIT: int = 25  # 定时任务IPMI并发限制
+    
+    # SCHEDULER_CREDENTIAL_CACHE_TTL: 定时刷新缓存的服务器IPMI连接信息有效期(秒)
+    # 建议配置范围: 60-1800
+    # 调整考虑因素: 服务器服务之外修改连接信息(其他进程、直接改库)时，最长经过该时间后生效
+    SCHEDULER_CREDENTIAL_CACHE_TTL: int = 300  # IPMI连接信息缓存时间(秒)
+    
+    # CLUSTER_STATS_CACHE_TTL: 集群统计结果缓存时间(秒)
+    # 建议配置范围: 0-10 (0 表示不缓存)
+    # 调整考虑因素: 仪表盘多用户高频轮询时可大幅降低数据库查询；后台状态刷新造成的偏差不超过该时间
+    CLUSTER_STATS_CACHE_TTL: int = 3  # 集群统计缓存时间(秒)
+    
     # OFFLINE_SERVER_CHECK_INTERVAL: 离线服务器检查间隔（分钟）
     # 建议配置范围: 1-10 (根据实时性要求调整)
     # 调整考虑因素: 过短会增加服务器负载和网络流量，过长可能导致状态更新不及时
@@ -265,6 +307,11 @@ class Settings(BaseSettings):
     # 调整考虑因素: 需确保目录存在且有写权限；路径需与Prometheus配置一致
     PROMETHEUS_TARGETS_PATH: str = "/etc/prometheus/targets/ipmi-targets.json"
     
+    # PROMETHEUS_RELOAD_DEBOUNCE_MS: Prometheus配置重载防抖时间（毫秒）
+    # 建议配置范围: 0-2000 (0表示不防抖，每次写入配置后立即重载)
+    # 调整考虑因素: 窗口内的多次重载请求合并为一次，过长会延迟监控目标生效
+    PROMETHEUS_RELOAD_DEBOUNCE_MS: int = 300  # 重载防抖时间（毫秒）
+    
     # 监控数据清理配置
     
     # MONITORING_DATA_RETENTION_DAYS: 监控数据保留天数
@@ -62,6 +62,8 @@ else:
     engine_kwargs["max_overflow"] = settings.DATABASE_MAX_OVERFLOW
     engine_kwargs["pool_recycle"] = settings.DATABASE_POOL_RECYCLE
     engine_kwargs["pool_pre_ping"] = settings.DATABASE_POOL_PRE_PING
+    # 后进先出复用连接，优先使用最近用过的热连接，空闲连接可被自然回收
+    engine_kwargs["pool_use_lifo"] = settings.DATABASE_POOL_USE_LIFO
     engine_kwargs["echo"] = settings.DATABASE_ECHO
 
 # 创建异步引擎
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -19,10 +19,16 @@ class PowerState(str, enum.Enum):
 
 class Server(Base):
     __tablename__ = "servers"
+    # 插入/更新时通过 RETURNING 一并取回 created_at、updated_at 等数据库生成的值，提交后无需再 refresh
+    __mapper_args__ = {"eager_defaults": True}
+    # 集群统计的覆盖索引：按状态/电源状态/分组/厂商的聚合查询只扫描索引，不回表
+    __table_args__ = (
+        Index("ix_servers_stats", "group_id", "status", "power_state", "manufacturer"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(100), nullable=False, index=True)
-    ipmi_ip = Column(String(15), nullable=False, index=True)
+    name = Column(String(100), nullable=False, unique=True, index=True)
+    ipmi_ip = Column(String(15), nullable=False, unique=True, index=True)
     ipmi_username = Column(String(50), nullable=False)
     ipmi_password = Column(String(255), nullable=False)
     ipmi_port = Column(Integer, default=settings.IPMI_DEFAULT_PORT, nullable=False)
@@ -59,6 +65,8 @@ class Server(Base):
 
 class ServerGroup(Base):
     __tablename__ = "server_groups"
+    # 插入/更新时通过 RETURNING 一并取回 created_at、updated_at 等数据库生成的值，提交后无需再 refresh
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, unique=True, index=True)
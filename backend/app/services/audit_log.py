@@ -137,9 +137,7 @@ class AuditLogService:
     
     async def get_log_by_id(self, log_id: int) -> Optional[AuditLog]:
         """获取指定ID的审计日志"""
-        stmt = select(AuditLog).where(AuditLog.id == log_id)
-        result = await self.db.execute(stmt)
-        return result.scalar_one_or_none()
+        return await self.db.get(AuditLog, log_id)
     
     async def log_login(
         self,
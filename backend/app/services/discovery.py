@@ -2,9 +2,10 @@ import asyncio
 import socket
 import ipaddress
 from typing import List, Dict, Any, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import subprocess
 import logging
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 import csv
@@ -15,7 +16,7 @@ import traceback
 from contextlib import closing
 
 from app.services.ipmi import IPMIService
-from app.services.server import ServerService
+from app.services.server import ServerService, _chunked
 from app.schemas.server import ServerCreate
 from app.models.server import Server
 from app.core.exceptions import ValidationError
@@ -395,10 +396,18 @@ class DiscoveryService:
         failed_count = 0
         failed_details = []
         
+        # 一次查询取回与待导入IP或名称冲突的已有记录，替代逐台设备的两次唯一性查询
+        # 漏检的冲突（如加后缀后的名称）仍由数据库唯一约束兜底，写入时会转换为验证错误
+        pending = []
+        existing_ips, existing_names = await self._get_existing_ips_and_names(
+            [device["ip"] for device in discovered_devices],
+            [self._generate_server_name(device) for device in discovered_devices]
+        )
+        
         for device in discovered_devices:
             try:
                 # 检查IP是否已存在
-                if await self.server_service.get_server_by_ipmi_ip_async(device["ip"]):
+                if device["ip"] in existing_ips:
                     failed_count += 1
                     failed_details.append({
                         "ip": device["ip"],
@@ -410,7 +419,7 @@ class DiscoveryService:
                 server_name = self._generate_server_name(device)
                 
                 # 检查名称是否已存在
-                if await self.server_service.get_server_by_name_async(server_name):
+                if server_name in existing_names:
                     # 如果名称已存在，加上IP后缀
                     server_name = f"{server_name}-{device['ip'].replace('.', '-')}"
                 
@@ -432,11 +441,10 @@ class DiscoveryService:
                     group_id=group_id
                 )
                 
-                # 创建服务器
-                await self.server_service.create_server(server_data)
-                success_count += 1
-                
-                logger.info(f"成功导入服务器: {server_name} ({device['ip']})")
+                # 校验通过的服务器暂存，循环结束后统一批量写入
+                pending.append(({"ip": device["ip"]}, server_data))
+                existing_ips.add(device["ip"])
+                existing_names.add(server_name)
                 
             except Exception as e:
                 failed_count += 1
@@ -446,6 +454,12 @@ class DiscoveryService:
                 })
                 logger.error(f"导入服务器失败 {device['ip']}: {str(e)}")
         
+        # 批量创建服务器
+        create_failures = await self._create_servers(pending)
+        success_count += len(pending) - len(create_failures)
+        failed_count += len(create_failures)
+        failed_details.extend(create_failures)
+        
         result = {
             "total_count": len(discovered_devices),
             "success_count": success_count,
@@ -456,6 +470,48 @@ class DiscoveryService:
         logger.info(f"批量导入完成: 成功 {success_count}, 失败 {failed_count}")
         return result
     
+    async def _create_servers(self, pending: List[Tuple[Dict[str, Any], ServerCreate]]) -> List[Dict[str, Any]]:
+        """
+        批量写入待导入的服务器（一个事务、一次提交），返回写入失败项的明细
+        整批因唯一约束冲突或其他完整性错误失败时改为逐台写入，以便定位并报告具体失败的服务器
+        """
+        if not pending:
+            return []
+        
+        try:
+            await self.server_service.bulk_create_servers([server_data for _, server_data in pending])
+            for _, server_data in pending:
+                logger.info(f"成功导入服务器: {server_data.name} ({server_data.ipmi_ip})")
+            return []
+        except ValidationError as e:
+            logger.warning(f"批量写入服务器失败，改为逐台写入: {e.message}")
+        except IntegrityError as e:
+            # 非唯一约束的完整性错误（如分组不存在），同样逐台写入以定位失败项
+            logger.warning(f"批量写入服务器失败，改为逐台写入: {e.orig}")
+        
+        failures = []
+        for detail, server_data in pending:
+            try:
+                await self.server_service.create_server(server_data)
+                logger.info(f"成功导入服务器: {server_data.name} ({server_data.ipmi_ip})")
+            except Exception as e:
+                failures.append({**detail, "error": str(e)})
+                logger.error(f"导入服务器失败 {server_data.ipmi_ip}: {str(e)}")
+        return failures
+    
+    async def _get_existing_ips_and_names(self, ips: List[str], names: List[str]) -> Tuple[set, set]:
+        """批量查询已存在的IPMI IP和服务器名称，分批执行 IN 查询，避免超出数据库绑定参数数量上限"""
+        existing_ips = set()
+        for chunk in _chunked(list(set(ips))):
+            result = await self.db.execute(select(Server.ipmi_ip).where(Server.ipmi_ip.in_(chunk)))
+            existing_ips.update(result.scalars())
+        
+        existing_names = set()
+        for chunk in _chunked(list(set(names))):
+            result = await self.db.execute(select(Server.name).where(Server.name.in_(chunk)))
+            existing_names.update(result.scalars())
+        return existing_ips, existing_names
+    
     def _generate_server_name(self, device: Dict[str, Any]) -> str:
         """生成服务器名称"""
         manufacturer = device.get("manufacturer", "").strip()
@@ -502,7 +558,8 @@ class DiscoveryService:
             if not required_fields.issubset(set(csv_reader.fieldnames or [])):
                 raise ValidationError(f"CSV文件缺少必需字段: {required_fields}")
             
-            # 逐行处理
+            # 逐行解析和校验
+            parsed = []
             for row_num, row in enumerate(csv_reader, start=2):  # 从第2行开始计数（第1行是头部）
                 try:
                     # 清理空白字符
@@ -534,12 +591,6 @@ class DiscoveryService:
                         except ValueError:
                             raise ValidationError("IPMI端口必须是数字")
                     
-                    # 检查名称和IP唯一性
-                    if await self.server_service.get_server_by_name_async(cleaned_row["name"]):
-                        raise ValidationError("服务器名称已存在")
-                    if await self.server_service.get_server_by_ipmi_ip_async(cleaned_row["ipmi_ip"]):
-                        raise ValidationError("IPMI IP地址已存在")
-                    
                     # 创建服务器数据
                     server_data = ServerCreate(
                         name=cleaned_row["name"],
@@ -554,11 +605,12 @@ class DiscoveryService:
                         group_id=group_id
                     )
                     
-                    # 创建服务器
-                    await self.server_service.create_server(server_data)
-                    success_count += 1
-                    
-                    logger.info(f"成功导入服务器: {cleaned_row['name']} ({cleaned_row['ipmi_ip']})")
+                    # 校验通过的行暂存，全部解析后统一检查唯一性并批量写入
+                    parsed.append(({
+                        "row": row_num,
+                        "name": row.get("name", ""),
+                        "ipmi_ip": row.get("ipmi_ip", "")
+                    }, server_data))
                     
                 except Exception as e:
                     failed_count += 1
@@ -570,6 +622,33 @@ class DiscoveryService:
                     })
                     logger.error(f"CSV第{row_num}行导入失败: {str(e)}")
             
+            # 一次查询取回与已有服务器冲突的名称和IP（文件内重复的行同样视为冲突）
+            existing_ips, existing_names = await self._get_existing_ips_and_names(
+                [server_data.ipmi_ip for _, server_data in parsed],
+                [server_data.name for _, server_data in parsed]
+            )
+            pending = []
+            for detail, server_data in parsed:
+                if server_data.name in existing_names:
+                    error = "服务器名称已存在"
+                elif server_data.ipmi_ip in existing_ips:
+                    error = "IPMI IP地址已存在"
+                else:
+                    pending.append((detail, server_data))
+                    existing_names.add(server_data.name)
+                    existing_ips.add(server_data.ipmi_ip)
+                    continue
+                failed_count += 1
+                failed_details.append({**detail, "error": error})
+                logger.error(f"CSV第{detail['row']}行导入失败: {error}")
+            
+            # 批量创建服务器
+            create_failures = await self._create_servers(pending)
+            success_count += len(pending) - len(create_failures)
+            failed_count += len(create_failures)
+            failed_details.extend(create_failures)
+            failed_details.sort(key=lambda detail: detail["row"])
+            
         except Exception as e:
             logger.error(f"CSV解析失败: {str(e)}")
             raise ValidationError(f"CSV文件格式错误: {str(e)}")
@@ -1,7 +1,10 @@
 import asyncio
 import logging
 import json
+import signal
+import threading
 import time
+from contextlib import asynccontextmanager, contextmanager
 from typing import Dict, Any, Optional, List
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
@@ -17,6 +20,35 @@ from app.core.timing_decorator import timing_debug
 
 logger = logging.getLogger(__name__)
 
+# ==============================================================================
+# IPMI 探测协议 Payload 定义
+# ==============================================================================
+
+# 1. IPMI v2.0 (RMCP+) - Get Channel Authentication Capabilities
+# 适用于: OpenBMC, Dell iDRAC 7/8/9, HP iLO 4/5, Lenovo XCC 等现代设备
+# 即使未提供账号密码，BMC 也会回复支持的加密算法列表。
+PAYLOAD_V2 = bytes.fromhex("0600ff07000000000000000000092018c88100388e04b5")
+
+# 2. IPMI v1.5 (ASF) - Presence Ping
+# 适用于: 2010年以前的老旧服务器 (Supermicro IPMI 1.5 等)
+# 现代设备可能会忽略此包，因此需要与 V2 包混合发送。
+PAYLOAD_V1_5 = bytes.fromhex("0600ff06000011be803f10020001050000000000")
+
+
+class _RMCPPingProtocol(asyncio.DatagramProtocol):
+    """异步UDP探测协议：收到任何响应即认为BMC在线"""
+
+    def __init__(self, future: asyncio.Future):
+        self._future = future
+
+    def datagram_received(self, data, addr):
+        if data and not self._future.done():
+            self._future.set_result(True)
+
+    def error_received(self, exc):
+        # ICMP 不可达等错误，等待超时后判定为离线
+        pass
+
 # =================================================================================
 # 第一部分：多进程工作函数 (Top-level Functions)
 # 这些函数必须定义在类外部，以便 Python 的 multiprocessing 可以序列化 (pickle) 它们。
@@ -45,6 +77,86 @@ def _mp_get_power(ip, username, password, port):
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
+# [子进程] 常驻轮询进程内的会话缓存: {(ip, username, password, port): (conn, expires_at)}
+# 仅在不回收子进程的轮询进程池中有效，复用已登录的会话可省去每次轮询的认证握手
+_mp_session_cache = {}
+
+def _mp_get_cached_connection(ip, username, password, port):
+    """[子进程] 获取缓存的保活连接，不存在或已过期时重新建立"""
+    now = time.monotonic()
+    # 惰性清理过期会话
+    for key in [k for k, (_, expires_at) in _mp_session_cache.items() if expires_at <= now]:
+        _mp_drop_cached_connection(*key)
+
+    key = (ip, username, password, port)
+    entry = _mp_session_cache.get(key)
+    if entry:
+        return entry[0]
+
+    conn = command.Command(
+        bmc=ip,
+        userid=username,
+        password=password,
+        port=port,
+        keepalive=True,  # 常驻进程中保持会话，供后续轮询复用
+        interface=settings.IPMI_INTERFACE_TYPE,
+        privlevel=settings.IPMI_PRIVILEGE_LEVEL
+    )
+    _mp_session_cache[key] = (conn, now + settings.IPMI_SESSION_CACHE_TTL)
+    return conn
+
+def _mp_drop_cached_connection(ip, username, password, port, logout=True):
+    """[子进程] 移除缓存的会话，logout 为真时尽量登出"""
+    entry = _mp_session_cache.pop((ip, username, password, port), None)
+    if entry and logout:
+        try:
+            entry[0].ipmi_session.logout()
+        except Exception:
+            pass
+
+class _MPDeadlineExceeded(BaseException):
+    """[子进程] 单台主机的IPMI调用超时（继承 BaseException，避免被 pyghmi 内部的异常处理吞掉）"""
+
+@contextmanager
+def _mp_deadline(seconds):
+    """
+    [子进程] 限制代码块的执行时间，超时抛出 _MPDeadlineExceeded
+    进程池任务在子进程主线程中执行，使用 SIGALRM 实现；不支持的平台或非主线程中不限时
+    """
+    if not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def _on_alarm(signum, frame):
+        raise _MPDeadlineExceeded()
+
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def _mp_get_power_bulk(ips, username, password, port, host_timeout):
+    """[子进程] 批量获取同一凭据下多台BMC的电源状态，每台主机单独限时 host_timeout 秒"""
+    # 同一凭据的多台主机共用一个子进程，摊薄进程创建开销；单台失败或超时不影响其余主机
+    states = {}
+    for ip in ips:
+        try:
+            with _mp_deadline(host_timeout):
+                conn = _mp_get_cached_connection(ip, username, password, port)
+                states[ip] = conn.get_power().get('powerstate', 'unknown')
+        except _MPDeadlineExceeded:
+            # 无响应的会话不再尝试登出，避免再次阻塞
+            _mp_drop_cached_connection(ip, username, password, port, logout=False)
+            states[ip] = 'unknown'
+        except Exception:
+            # 会话可能已失效，丢弃后下次轮询重新认证
+            _mp_drop_cached_connection(ip, username, password, port)
+            states[ip] = 'unknown'
+    return {"status": "success", "data": states}
+
 def _mp_set_power(ip, username, password, port, action):
     """[子进程] 设置电源"""
     power_actions = {'on': 'on', 'off': 'off', 'restart': 'reset', 'force_off': 'off', 'force_restart': 'cycle'}
@@ -86,103 +198,117 @@ def _mp_manage_user(ip, admin_user, admin_pass, port, operation, **kwargs):
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
-def _mp_get_system_info(ip, username, password, port, initial_ip):
-    """[子进程] 获取系统详细信息 (FRU + LAN)"""
+def _mp_read_system_info(conn, initial_ip):
+    """[子进程] 在已建立的连接上读取系统详细信息 (FRU + LAN)"""
     # 完整保留原有逻辑，确保解析结果一致
-    results = {}
+    # 1. 获取系统清单
+    system_info = None
     try:
-        conn = _mp_create_connection(ip, username, password, port)
+        inventory_generator = conn.get_inventory()
+        for name, info in inventory_generator:
+            if isinstance(info, dict):
+                if (info.get('Manufacturer') or info.get('Board manufacturer') or 
+                    info.get('Product name') or info.get('Board product name')):
+                    system_info = info
+                    break
         
-        # 1. 获取系统清单
-        system_info = None
-        try:
+        if not system_info:
             inventory_generator = conn.get_inventory()
-            for name, info in inventory_generator:
-                if isinstance(info, dict):
-                    if (info.get('Manufacturer') or info.get('Board manufacturer') or 
-                        info.get('Product name') or info.get('Board product name')):
-                        system_info = info
-                        break
-            
-            if not system_info:
-                inventory_generator = conn.get_inventory()
-                try:
-                    _, system_info = next(inventory_generator)
-                except StopIteration:
-                    pass
-        except Exception:
-            pass
+            try:
+                _, system_info = next(inventory_generator)
+            except StopIteration:
+                pass
+    except Exception:
+        pass
 
-        # 解析 FRU 信息
-        manufacturer = 'Unknown'
-        product = 'Unknown'
-        serial = 'Unknown'
-        bmc_version = 'Unknown'
+    # 解析 FRU 信息
+    manufacturer = 'Unknown'
+    product = 'Unknown'
+    serial = 'Unknown'
+    bmc_version = 'Unknown'
 
-        if system_info and isinstance(system_info, dict):
-            def fix_encoding(text):
-                if not text or text == 'Unknown': return text
-                try:
-                    if 'å' in text or '¤' in text:
-                        return text.encode('latin-1').decode('utf-8')
-                except: pass
-                try: return text.encode('latin-1').decode('gbk')
-                except: pass
-                return text
-
-            manufacturer = (system_info.get('Manufacturer') or system_info.get('Board manufacturer') or 
-                            system_info.get('Mfg') or system_info.get('Vendor') or 'Unknown')
-            
-            if manufacturer == 'Unknown':
-                prod = (system_info.get('Product name') or '').lower()
-                if 'dell' in prod: manufacturer = 'Dell'
-                elif 'hp' in prod: manufacturer = 'HPE'
-                elif 'lenovo' in prod: manufacturer = 'Lenovo'
-                elif 'huawei' in prod: manufacturer = 'Huawei'
-                elif 'inspur' in prod: manufacturer = 'Inspur'
-
-            product = (system_info.get('Product name') or system_info.get('Board product name') or 
-                       system_info.get('Product') or system_info.get('Model') or 'Unknown')
-            
-            serial = (system_info.get('Serial Number') or system_info.get('Board serial number') or 
-                      system_info.get('Chassis serial number') or system_info.get('Serial') or 'Unknown')
-            
-            bmc_version = (system_info.get('firmware_version') or system_info.get('Firmware Version') or 
-                           system_info.get('Version') or 'Unknown')
+    if system_info and isinstance(system_info, dict):
+        def fix_encoding(text):
+            if not text or text == 'Unknown': return text
+            try:
+                if 'å' in text or '¤' in text:
+                    return text.encode('latin-1').decode('utf-8')
+            except: pass
+            try: return text.encode('latin-1').decode('gbk')
+            except: pass
+            return text
+
+        manufacturer = (system_info.get('Manufacturer') or system_info.get('Board manufacturer') or 
+                        system_info.get('Mfg') or system_info.get('Vendor') or 'Unknown')
+        
+        if manufacturer == 'Unknown':
+            prod = (system_info.get('Product name') or '').lower()
+            if 'dell' in prod: manufacturer = 'Dell'
+            elif 'hp' in prod: manufacturer = 'HPE'
+            elif 'lenovo' in prod: manufacturer = 'Lenovo'
+            elif 'huawei' in prod: manufacturer = 'Huawei'
+            elif 'inspur' in prod: manufacturer = 'Inspur'
+
+        product = (system_info.get('Product name') or system_info.get('Board product name') or 
+                   system_info.get('Product') or system_info.get('Model') or 'Unknown')
+        
+        serial = (system_info.get('Serial Number') or system_info.get('Board serial number') or 
+                  system_info.get('Chassis serial number') or system_info.get('Serial') or 'Unknown')
+        
+        bmc_version = (system_info.get('firmware_version') or system_info.get('Firmware Version') or 
+                       system_info.get('Version') or 'Unknown')
 
-            manufacturer = fix_encoding(manufacturer)
-            product = fix_encoding(product)
+        manufacturer = fix_encoding(manufacturer)
+        product = fix_encoding(product)
 
-        # 2. 获取 LAN 配置
-        bmc_ip = initial_ip
-        bmc_mac = 'Unknown'
+    # 2. 获取 LAN 配置
+    bmc_ip = initial_ip
+    bmc_mac = 'Unknown'
+    try:
+        lan_info = conn.get_net_configuration(channel=1)
+        if lan_info:
+            bmc_ip = lan_info.get('ipv4_address', initial_ip).split('/')[0]
+            bmc_mac = lan_info.get('mac_address', 'Unknown')
+    except Exception:
+        pass
+    
+    # 尝试备用方法获取 BMC 版本
+    if bmc_version == 'Unknown':
         try:
-            lan_info = conn.get_net_configuration(channel=1)
-            if lan_info:
-                bmc_ip = lan_info.get('ipv4_address', initial_ip).split('/')[0]
-                bmc_mac = lan_info.get('mac_address', 'Unknown')
+            bmc_conf = conn.get_bmc_configuration()
+            if bmc_conf and isinstance(bmc_conf, dict):
+                bmc_version = bmc_conf.get('firmware_version', 'Unknown')
         except Exception:
             pass
-        
-        # 尝试备用方法获取 BMC 版本
-        if bmc_version == 'Unknown':
-            try:
-                bmc_conf = conn.get_bmc_configuration()
-                if bmc_conf and isinstance(bmc_conf, dict):
-                    bmc_version = bmc_conf.get('firmware_version', 'Unknown')
-            except Exception:
-                pass
 
+    return {
+        "manufacturer": manufacturer,
+        "product": product,
+        "serial": serial,
+        "bmc_ip": bmc_ip,
+        "bmc_mac": bmc_mac,
+        "bmc_version": bmc_version
+    }
+
+def _mp_get_system_info(ip, username, password, port, initial_ip):
+    """[子进程] 获取系统详细信息 (FRU + LAN)"""
+    try:
+        conn = _mp_create_connection(ip, username, password, port)
+        return {"status": "success", "data": _mp_read_system_info(conn, initial_ip)}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+def _mp_get_status_bundle(ip, username, password, port, initial_ip):
+    """[子进程] 在同一个IPMI会话中获取电源状态和系统信息，省去第二次认证握手"""
+    try:
+        conn = _mp_create_connection(ip, username, password, port)
+        try:
+            power_state = conn.get_power().get('powerstate', 'unknown')
+        except Exception:
+            power_state = 'unknown'
         return {
             "status": "success",
-            "data": {
-                "manufacturer": manufacturer,
-                "product": product,
-                "serial": serial,
-                "bmc_ip": bmc_ip,
-                "bmc_mac": bmc_mac,
-                "bmc_version": bmc_version
-            }
+            "data": {"power_state": power_state, "system_info": _mp_read_system_info(conn, initial_ip)}
         }
     except Exception as e:
         return {"status": "error", "error": str(e)}
@@ -238,7 +364,14 @@ class IPMIService:
     """IPMI服务"""
     
     _process_pool = None
+    _poll_pool = None
+    # 轮询进程池的空闲进程名额，与进程数相等；任务只在有空闲子进程时提交，不在进程池内部排队
+    _poll_slots: Optional[asyncio.Semaphore] = None
     _thread_pool = None
+    _http_client = None
+    # 按BMC地址划分的锁及其使用者数量（所有实例共享），保证同一BMC同一时刻只有一个电源控制会话；
+    # 没有使用者时移除，字典大小只与正在操作的BMC数量有关
+    _bmc_locks: Dict[str, List] = {}
 
     def __init__(self):
         # 1. 初始化进程池（单例模式，避免重复创建）
@@ -255,19 +388,87 @@ class IPMIService:
                 IPMIService._process_pool = ProcessPoolExecutor(max_workers=max_procs)
             logger.info(f"IPMI ProcessPoolExecutor started with {max_procs} workers")
         
-        # 2. 初始化线程池
+        # 2. 初始化常驻轮询进程池
+        # 子进程不回收，以便在进程内缓存已登录的IPMI会话，仅用于定时电源状态轮询
+        IPMIService._ensure_poll_pool()
+        
+        # 3. 初始化线程池
         # 用于 Redfish 等 IO 密集型操作
         if IPMIService._thread_pool is None:
             max_threads = getattr(settings, 'IPMI_THREAD_POOL_SIZE', 20)
             IPMIService._thread_pool = ThreadPoolExecutor(max_workers=max_threads)
         
-        # 3. 信号量控制并发请求数
+        # 4. 信号量控制并发请求数
         limit = getattr(settings, 'IPMI_CONCURRENT_LIMIT', 20)
         self._semaphore = asyncio.Semaphore(limit)
 
+    @classmethod
+    def _ensure_poll_pool(cls):
+        """创建常驻轮询进程池及对应的进程名额（已存在时不重复创建）"""
+        if cls._poll_pool is None:
+            size = max(1, getattr(settings, 'IPMI_POLL_PROCESS_POOL_SIZE', 6))
+            cls._poll_pool = ProcessPoolExecutor(max_workers=size)
+            cls._poll_slots = asyncio.Semaphore(size)
+            logger.info(f"IPMI poll ProcessPoolExecutor started with {size} workers")
+
+    @classmethod
+    def shutdown_poll_pool(cls):
+        """关闭常驻轮询进程池（应用关闭时调用），不等待仍在执行的轮询任务"""
+        if cls._poll_pool is not None:
+            cls._poll_pool.shutdown(wait=False, cancel_futures=True)
+            cls._poll_pool = None
+            cls._poll_slots = None
+
+    @classmethod
+    def poll_concurrency(cls) -> int:
+        """同时执行的批量轮询任务数上限，即轮询进程池的进程数"""
+        return max(1, getattr(settings, 'IPMI_POLL_PROCESS_POOL_SIZE', 6))
+
+    @staticmethod
+    def bulk_poll_timeout(host_count: int) -> float:
+        """一次批量电源状态查询的超时预算：子进程内每台主机单独限时，外加一台的余量"""
+        return settings.IPMI_POWER_STATE_TIMEOUT * (host_count + 1)
+
+    @classmethod
+    @asynccontextmanager
+    async def _bmc_lock(cls, ip: str):
+        """独占指定BMC，不同BMC之间互不阻塞；最后一个使用者退出时移除该BMC的锁"""
+        entry = cls._bmc_locks.get(ip)
+        if entry is None:
+            entry = cls._bmc_locks[ip] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del cls._bmc_locks[ip]
+
+    @classmethod
+    def _get_http_client(cls) -> httpx.AsyncClient:
+        """获取共享的 Redfish HTTP 客户端，复用到同一BMC的 TCP/TLS 连接"""
+        if cls._http_client is None or cls._http_client.is_closed:
+            cls._http_client = httpx.AsyncClient(
+                verify=settings.REDFISH_VERIFY_SSL,
+                limits=httpx.Limits(
+                    max_connections=getattr(settings, 'IPMI_CONCURRENT_LIMIT', 20),
+                    keepalive_expiry=settings.REDFISH_KEEPALIVE_EXPIRY
+                )
+            )
+        return cls._http_client
+
+    @classmethod
+    async def aclose_http_client(cls):
+        """关闭共享的 Redfish HTTP 客户端（应用关闭时调用）"""
+        if cls._http_client is not None:
+            await cls._http_client.aclose()
+            cls._http_client = None
+
     def close(self):
         """关闭服务资源"""
-        # 注意：通常在应用生命周期结束时才真正关闭池，或者这里留空让 OS 回收
+        # 进程池、线程池均由所有实例共享，实例本身不持有需要释放的资源；
+        # 常驻轮询进程池在应用关闭时由 lifespan 调用 shutdown_poll_pool 统一关闭
         pass
 
     def _ensure_port_is_int(self, port):
@@ -276,6 +477,15 @@ class IPMIService:
         except (ValueError, TypeError):
             raise IPMIError(f"端口参数无效: {port}")
 
+    @staticmethod
+    def _unwrap_result(result):
+        """检查子进程返回的数据结构，成功时返回数据，业务逻辑错误（连接失败等）转换为 IPMIError"""
+        if isinstance(result, dict):
+            if result.get("status") == "success":
+                return result.get("data")
+            raise IPMIError(result.get("error", "未知错误"))
+        return result
+
     async def _run_in_process(self, func, *args, timeout=None):
         """
         核心调度函数：将任务提交给进程池，并带有严格的超时控制。
@@ -297,16 +507,7 @@ class IPMIService:
                     ),
                     timeout=timeout
                 )
-                
-                # 检查子进程返回的数据结构
-                if isinstance(result, dict):
-                    if result.get("status") == "success":
-                        return result.get("data") # 成功返回数据
-                    else:
-                        # 业务逻辑错误（连接失败等）
-                        error_msg = result.get("error", "未知错误")
-                        raise IPMIError(error_msg)
-                return result
+                return self._unwrap_result(result)
 
             except asyncio.TimeoutError:
                 logger.error(f"IPMI 任务超时 ({timeout}s) - 调用: {func.__name__}")
@@ -317,6 +518,35 @@ class IPMIService:
                 logger.error(f"IPMI 执行异常: {e}")
                 raise IPMIError(f"执行异常: {str(e)}")
 
+    async def _run_in_poll_pool(self, func, *args, timeout: float):
+        """
+        在常驻轮询进程池中执行任务
+        先占用一个空闲进程名额再提交，提交后任务立即开始执行，超时只计算实际执行时间，不含排队时间；
+        超时后子进程中的任务仍在执行，名额要等任务真正结束才释放，后续任务不会排在卡住的子进程后面
+        """
+        IPMIService._ensure_poll_pool()
+        slots = IPMIService._poll_slots
+        async with self._semaphore:
+            await slots.acquire()
+            try:
+                future = asyncio.get_running_loop().run_in_executor(IPMIService._poll_pool, func, *args)
+            except BaseException:
+                slots.release()
+                raise
+            future.add_done_callback(lambda _: slots.release())
+            try:
+                # shield 防止超时取消 future 而提前释放名额
+                result = await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+                return self._unwrap_result(result)
+            except asyncio.TimeoutError:
+                logger.error(f"IPMI 轮询任务超时 ({timeout}s) - 调用: {func.__name__}")
+                raise IPMIError(f"IPMI操作超时({timeout}秒)")
+            except IPMIError:
+                raise
+            except Exception as e:
+                logger.error(f"IPMI 执行异常: {e}")
+                raise IPMIError(f"执行异常: {str(e)}")
+
     async def _run_in_thread(self, func, *args):
         """在线程池中运行（适用于 Redfish/Requests 库）"""
         loop = asyncio.get_running_loop()
@@ -345,12 +575,57 @@ class IPMIService:
             logger.warning(f"获取电源状态失败 {ip}: {str(e)}")
             return "unknown"  # 返回字符串，防止 None.lower() 报错
 
+    async def ping_bmc(self, ip: str, port: int = settings.IPMI_DEFAULT_PORT, timeout: float = settings.SERVER_ONLINE_CHECK_TIMEOUT) -> bool:
+        """
+        异步UDP探测BMC是否响应 (RMCP v2.0 + v1.5 混合发包)
+        直接在事件循环中完成，不占用进程池和线程池；3次重试，每次占用总超时的 1/3
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        try:
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _RMCPPingProtocol(future),
+                remote_addr=(ip, int(port))
+            )
+        except (OSError, ValueError, TypeError):
+            return False
+
+        max_retries = 3
+        try:
+            for _ in range(max_retries):
+                transport.sendto(PAYLOAD_V2)
+                transport.sendto(PAYLOAD_V1_5)
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), timeout / max_retries)
+                except asyncio.TimeoutError:
+                    continue
+            return False
+        finally:
+            transport.close()
+
+    @timing_debug
+    async def get_power_states_bulk(self, ips: List[str], username: str, password: str, port: int = settings.IPMI_DEFAULT_PORT) -> Dict[str, str]:
+        """批量获取同一凭据下多台BMC的电源状态，返回 {ip: power_state}"""
+        port = self._ensure_port_is_int(port)
+        try:
+            # 在常驻轮询进程内逐台查询并复用缓存会话，每台主机在子进程内单独限时，
+            # 单台BMC无响应只影响其自身；外层超时仅作为子进程整体卡死时的兜底
+            return await self._run_in_poll_pool(
+                _mp_get_power_bulk, list(ips), username, password, port, settings.IPMI_POWER_STATE_TIMEOUT,
+                timeout=self.bulk_poll_timeout(len(ips))
+            )
+        except IPMIError as e:
+            logger.warning(f"批量获取电源状态失败 {ips}: {str(e)}")
+            return {ip: "unknown" for ip in ips}
+
     @timing_debug
     async def power_control(self, ip: str, username: str, password: str, action: str, port: int = settings.IPMI_DEFAULT_PORT) -> Dict[str, Any]:
         """电源控制"""
         port = self._ensure_port_is_int(port)
         # 操作类命令通常很快，但重启可能慢
-        res = await self._run_in_process(_mp_set_power, ip, username, password, port, action, timeout=settings.IPMI_POWER_CONTROL_TIMEOUT)
+        # 先按BMC排队再占用全局并发名额，等待同一BMC时不占用其他BMC可用的名额
+        async with self._bmc_lock(ip):
+            res = await self._run_in_process(_mp_set_power, ip, username, password, port, action, timeout=settings.IPMI_POWER_CONTROL_TIMEOUT)
         return {"action": action, "result": "success", "message": f"电源{action}操作成功", "data": res}
 
     @timing_debug
@@ -360,6 +635,15 @@ class IPMIService:
         # 系统信息获取包含大量命令，需要较长时间
         return await self._run_in_process(_mp_get_system_info, ip, username, password, port, ip, timeout=timeout or settings.IPMI_SYSTEM_INFO_TIMEOUT)
 
+    @timing_debug
+    async def get_status_bundle(self, ip: str, username: str, password: str, port: int = settings.IPMI_DEFAULT_PORT) -> Dict[str, Any]:
+        """在一个IPMI会话中同时获取电源状态和系统信息，返回 {'power_state': str, 'system_info': dict}"""
+        port = self._ensure_port_is_int(port)
+        return await self._run_in_process(
+            _mp_get_status_bundle, ip, username, password, port, ip,
+            timeout=settings.IPMI_POWER_STATE_TIMEOUT + settings.IPMI_SYSTEM_INFO_TIMEOUT
+        )
+
     @timing_debug
     async def get_sensor_data(self, ip: str, username: str, password: str, port: int = settings.IPMI_DEFAULT_PORT) -> Dict[str, Any]:
         """获取传感器数据"""
@@ -418,28 +702,30 @@ class IPMIService:
             start_time = time.time()
             try:
                 # httpx.AsyncClient 原生支持异步，不需要放进线程池/进程池
-                async with httpx.AsyncClient(verify=settings.REDFISH_VERIFY_SSL, timeout=timeout) as client:
-                    response = await client.get(f"https://{bmc_ip}/redfish/v1/")
-                    
-                    if response.status_code == 200:
-                        try:
-                            service_root = response.json()
-                            redfish_version = service_root.get("RedfishVersion", "Unknown")
-                            logger.info(f"[Redfish] 支持: {bmc_ip}, Ver: {redfish_version}")
-                            return {
-                                "supported": True, "version": redfish_version, 
-                                "service_root": service_root, "error": None, "check_success": True
-                            }
-                        except json.JSONDecodeError as e:
-                            return {
-                                "supported": False, "version": None, "service_root": None, 
-                                "error": f"JSON Error: {e}", "check_success": True
-                            }
-                    else:
+                # 使用共享客户端，批量检查或重复检查同一BMC时免去重复的 TCP/TLS 握手
+                client = self._get_http_client()
+                response = await client.get(f"https://{bmc_ip}/redfish/v1/", timeout=timeout)
+                
+                if response.status_code == 200:
+                    try:
+                        # 服务根响应只有几 KB，直接在事件循环中解析，比切换到线程池更快
+                        service_root = response.json()
+                        redfish_version = service_root.get("RedfishVersion", "Unknown")
+                        logger.info(f"[Redfish] 支持: {bmc_ip}, Ver: {redfish_version}")
+                        return {
+                            "supported": True, "version": redfish_version, 
+                            "service_root": service_root, "error": None, "check_success": True
+                        }
+                    except json.JSONDecodeError as e:
                         return {
                             "supported": False, "version": None, "service_root": None, 
-                            "error": f"HTTP {response.status_code}", "check_success": True
+                            "error": f"JSON Error: {e}", "check_success": True
                         }
+                else:
+                    return {
+                        "supported": False, "version": None, "service_root": None, 
+                        "error": f"HTTP {response.status_code}", "check_success": True
+                    }
             except Exception as e:
                 logger.error(f"[Redfish] Error {bmc_ip}: {e}")
                 return {
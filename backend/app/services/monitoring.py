@@ -131,10 +131,8 @@ class MonitoringService:
             
             # 获取服务器信息
             server_info_start = time.time()
-            # 使用异步查询方式
-            stmt = select(Server).where(Server.id == server_id)
-            result = await self.db.execute(stmt)
-            server = result.scalar_one_or_none()
+            # 按主键查询，会话标识映射中已有该实例时（如接口层已查询过）不再发出SQL
+            server = await self.db.get(Server, server_id)
             server_info_time = time.time() - server_info_start
             logger.debug(f"[监控采集] 获取服务器信息耗时: {server_info_time:.3f}秒")
             
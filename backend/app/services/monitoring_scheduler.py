@@ -1,10 +1,11 @@
 import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, Union
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.jobstores.base import JobLookupError
+from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_MAX_INSTANCES
 from sqlalchemy import select
 # [关键优化] 删除重复定义的 AsyncSessionLocal，使用从 database.py 导入的统一工厂
 from ..core.database import AsyncSessionLocal
@@ -27,6 +28,9 @@ class MonitoringSchedulerService:
         self._collect_job_id = "monitoring_data_collect"
         self._is_collecting = False
         
+        # 缓存采集任务的下次执行时间，get_status 无需查询 jobstore
+        self._next_run_time: Optional[datetime] = None
+        
         # [核心优化] 限制并发采集数量
         # 防止瞬间创建过多数据库连接导致连接池耗尽
         # 建议值：数据库连接池大小 (pool_size) 的 50% ~ 80%
@@ -41,7 +45,7 @@ class MonitoringSchedulerService:
             
         try:
             # 添加定时采集任务
-            self.scheduler.add_job(
+            job = self.scheduler.add_job(
                 self.collect_monitoring_data,
                 "interval",
                 minutes=settings.MONITORING_INTERVAL,
@@ -51,7 +55,11 @@ class MonitoringSchedulerService:
                 coalesce=True
             )
             
+            # 任务每次触发时更新缓存的下次执行时间
+            self.scheduler.add_listener(self._on_job_submitted, EVENT_JOB_SUBMITTED | EVENT_JOB_MAX_INSTANCES)
+            
             self.scheduler.start()
+            self._next_run_time = job.next_run_time
             self.is_running = True
             logger.info(f"监控数据采集服务已启动，采集间隔：{settings.MONITORING_INTERVAL}分钟")
             
@@ -68,6 +76,7 @@ class MonitoringSchedulerService:
         try:
             self.scheduler.shutdown(wait=False)
             self.is_running = False
+            self._next_run_time = None
             logger.info("监控数据采集服务已停止")
         except Exception as e:
             logger.error(f"停止监控任务失败: {e}")
@@ -168,20 +177,23 @@ class MonitoringSchedulerService:
                     logger.error(f"Server {server_id} 采集执行出错: {e}")
                     return False
 
+    def _on_job_submitted(self, event):
+        """采集任务触发后，按采集间隔推算并缓存下次执行时间"""
+        if event.job_id == self._collect_job_id and event.scheduled_run_times:
+            self._next_run_time = event.scheduled_run_times[-1] + timedelta(minutes=settings.MONITORING_INTERVAL)
+
     def get_status(self) -> Dict[str, Any]:
         """获取定时任务状态"""
         try:
-            collect_job = self.scheduler.get_job(self._collect_job_id)
-            
             status = {
                 "running": self.is_running,
                 "monitoring_enabled": settings.MONITORING_ENABLED,
                 "collect_job": None
             }
             
-            if collect_job:
+            if self.is_running:
                 status["collect_job"] = {
-                    "next_run": collect_job.next_run_time.isoformat() if collect_job.next_run_time else None,
+                    "next_run": self._next_run_time.isoformat() if self._next_run_time else None,
                     "interval_minutes": settings.MONITORING_INTERVAL
                 }
                 
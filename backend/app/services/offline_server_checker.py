@@ -1,33 +1,24 @@
 import asyncio
 import logging
 import socket
-from datetime import datetime
+from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_MAX_INSTANCES
 from sqlalchemy import select, update
 
 # 请根据实际项目路径调整导入
 from ..core.config import settings
 from ..core.database import AsyncSessionLocal
 from ..models.server import Server, ServerStatus
+# IPMI 探测协议 Payload 与电源状态轮询共用
+from .ipmi import PAYLOAD_V2, PAYLOAD_V1_5
+from .server import invalidate_cluster_statistics
 
 logger = logging.getLogger(__name__)
 
-# ==============================================================================
-# IPMI 探测协议 Payload 定义
-# ==============================================================================
-
-# 1. IPMI v2.0 (RMCP+) - Get Channel Authentication Capabilities
-# 适用于: OpenBMC, Dell iDRAC 7/8/9, HP iLO 4/5, Lenovo XCC 等现代设备
-# 即使未提供账号密码，BMC 也会回复支持的加密算法列表。
-PAYLOAD_V2 = bytes.fromhex("0600ff07000000000000000000092018c88100388e04b5")
-
-# 2. IPMI v1.5 (ASF) - Presence Ping
-# 适用于: 2010年以前的老旧服务器 (Supermicro IPMI 1.5 等)
-# 现代设备可能会忽略此包，因此需要与 V2 包混合发送。
-PAYLOAD_V1_5 = bytes.fromhex("0600ff06000011be803f10020001050000000000")
-
-# ==============================================================================
+# 流式读取离线服务器时每批的行数
+_STREAM_YIELD_PER = 1000
 
 class OfflineServerCheckerService:
     """
@@ -44,6 +35,9 @@ class OfflineServerCheckerService:
         self._check_job_id = "offline_server_check"
         self._is_checking = False
         
+        # 缓存检查任务的下次执行时间，get_status 无需查询 jobstore
+        self._next_run_time = None
+        
         # [资源管理] 持有后台任务引用，防止被 Python GC 提前回收导致任务中断
         self._initial_task = None
 
@@ -74,7 +68,7 @@ class OfflineServerCheckerService:
             # [规范修复] 使用 get_running_loop 替代 get_event_loop
             loop = asyncio.get_running_loop()
 
-            self.scheduler.add_job(
+            job = self.scheduler.add_job(
                 self.check_offline_servers,
                 "interval",
                 minutes=settings.OFFLINE_SERVER_CHECK_INTERVAL,
@@ -84,7 +78,11 @@ class OfflineServerCheckerService:
                 coalesce=True
             )
 
+            # 任务每次触发时更新缓存的下次执行时间
+            self.scheduler.add_listener(self._on_job_submitted, EVENT_JOB_SUBMITTED | EVENT_JOB_MAX_INSTANCES)
+            
             self.scheduler.start()
+            self._next_run_time = job.next_run_time
             self.is_running = True
             
             logger.info(
@@ -123,6 +121,7 @@ class OfflineServerCheckerService:
         try:
             self.scheduler.shutdown(wait=False)
             self.is_running = False
+            self._next_run_time = None
             
             # [资源清理] 取消正在运行的初始任务
             if self._initial_task and not self._initial_task.done():
@@ -151,35 +150,39 @@ class OfflineServerCheckerService:
             self._is_checking = True
             start_time = datetime.now()
 
-            # 1. 获取所有离线服务器列表
-            offline_servers = []
-            async with AsyncSessionLocal() as session:
-                stmt = select(Server).where(Server.status == ServerStatus.OFFLINE)
-                result = await session.execute(stmt)
-                offline_servers = result.scalars().all()
-
-            if not offline_servers:
-                logger.info("当前没有离线服务器，跳过检查")
-                return
-
-            logger.info(f"开始检查 {len(offline_servers)} 台离线服务器 (并发: {self._max_workers})")
-
-            # 2. 创建异步队列
+            # 1. 先启动消费者任务，再流式读取离线服务器放入队列
+            # 检查无需等待全部行加载完成，数据库读取与 UDP 探测重叠进行
             server_queue = asyncio.Queue()
-            for server in offline_servers:
-                await server_queue.put(server)
-
-            # 3. 创建消费者任务
             tasks = []
             for i in range(self._max_workers):
                 task = asyncio.create_task(self._worker(server_queue, i))
                 tasks.append(task)
 
-            # 4. 等待所有消费者完成
+            total = 0
+            try:
+                async with AsyncSessionLocal() as session:
+                    # 仅查询探测所需的列，返回轻量 Row 而非完整 ORM 对象
+                    stmt = select(Server.id, Server.ipmi_ip, Server.ipmi_port).where(
+                        Server.status == ServerStatus.OFFLINE
+                    ).execution_options(yield_per=_STREAM_YIELD_PER)
+                    result = await session.stream(stmt)
+                    async for server in result:
+                        total += 1
+                        server_queue.put_nowait(server)
+            finally:
+                # 2. 通知消费者队列已结束
+                for _ in tasks:
+                    server_queue.put_nowait(None)
+
+            # 3. 等待所有消费者完成
             await asyncio.gather(*tasks, return_exceptions=True)
 
+            if not total:
+                logger.info("当前没有离线服务器，跳过检查")
+                return
+
             elapsed = (datetime.now() - start_time).total_seconds()
-            logger.info(f"离线服务器检查完成: 耗时 {elapsed:.2f}s")
+            logger.info(f"离线服务器检查完成: 共 {total} 台 (并发: {self._max_workers}), 耗时 {elapsed:.2f}s")
 
         except Exception as e:
             logger.error(f"定时检查离线服务器状态全局异常: {e}")
@@ -187,11 +190,12 @@ class OfflineServerCheckerService:
             self._is_checking = False
 
     async def _worker(self, server_queue: asyncio.Queue, worker_id: int):
-        """工作者协程"""
-        while not server_queue.empty():
+        """工作者协程，收到 None 时退出"""
+        while True:
+            server = await server_queue.get()
+            if server is None:
+                break
             try:
-                server = server_queue.get_nowait()
-                
                 # 执行检查
                 is_online = await self._check_server_connectivity(server)
 
@@ -199,14 +203,13 @@ class OfflineServerCheckerService:
                     await self._update_server_status(server.id, ServerStatus.ONLINE)
                     logger.info(f"✅ 服务器 {server.id} ({server.ipmi_ip}) 已恢复在线")
             
-            except asyncio.QueueEmpty:
-                break
             except Exception as e:
                 logger.error(f"Worker-{worker_id} 处理异常: {e}")
 
-    async def _check_server_connectivity(self, server: Server) -> bool:
+    async def _check_server_connectivity(self, server) -> bool:
         """
         检查服务器连通性 (UDP Hybrid Probe)
+        server 只需提供 ipmi_ip 和 ipmi_port 属性 (ORM 对象或查询 Row 均可)
         """
         async with self._connectivity_semaphore:
             loop = asyncio.get_running_loop()
@@ -268,18 +271,24 @@ class OfflineServerCheckerService:
                 stmt = update(Server).where(Server.id == server_id).values(status=status)
                 await session.execute(stmt)
                 await session.commit()
+            # 状态变化后清除集群统计缓存
+            invalidate_cluster_statistics()
         except Exception as e:
             logger.error(f"更新服务器 {server_id} 状态失败: {e}")
 
+    def _on_job_submitted(self, event):
+        """检查任务触发后，按检查间隔推算并缓存下次执行时间"""
+        if event.job_id == self._check_job_id and event.scheduled_run_times:
+            self._next_run_time = event.scheduled_run_times[-1] + timedelta(minutes=settings.OFFLINE_SERVER_CHECK_INTERVAL)
+
     def get_status(self) -> dict:
         """获取服务内部状态监控"""
         try:
-            check_job = self.scheduler.get_job(self._check_job_id)
             return {
                 "running": self.is_running,
                 "concurrency": self._max_workers,
                 "timeout_setting": self._total_timeout,
-                "next_run": check_job.next_run_time.isoformat() if check_job and check_job.next_run_time else None
+                "next_run": self._next_run_time.isoformat() if self._next_run_time else None
             }
         except Exception as e:
             return {"error": str(e)}
\ No newline at end of file
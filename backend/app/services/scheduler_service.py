@@ -1,35 +1,120 @@
 import asyncio
 import logging
+import math
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.jobstores.base import JobLookupError
+from collections import defaultdict
+from typing import Dict, Any, List, NamedTuple, Optional, Set, Tuple
 
 from ..core.config import settings
 from .ipmi import IPMIService
 from ..core.database import async_engine, AsyncSessionLocal  # 导入统一的AsyncSessionLocal
 from ..models.server import Server, PowerState, ServerStatus
 from sqlalchemy.exc import SQLAlchemyError, DisconnectionError
-from sqlalchemy import update, select
+from sqlalchemy import update, select, bindparam
 
 logger = logging.getLogger(__name__)
 
 # [关键优化] 删除重复定义的 AsyncSessionLocal，使用从 database.py 导入的统一工厂
 
+# 流式读取服务器列表时每个分区的行数
+_STREAM_YIELD_PER = 500
+
+# 预构建的电源状态更新语句，绑定参数在执行时传入，批量执行时走 executemany
+# (Core 语句中绑定参数名不能与列名相同，因此使用 b_ 前缀)
+_servers_table = Server.__table__
+_UPDATE_POWER_STATE = (
+    update(_servers_table)
+    .where(_servers_table.c.id == bindparam("b_id"))
+    .values(status=bindparam("b_status"), power_state=bindparam("b_power_state"))
+)
+
+
+class _PollTarget(NamedTuple):
+    """一台待轮询服务器的连接信息与当前状态"""
+    id: int
+    ipmi_ip: str
+    ipmi_username: str
+    ipmi_password: str
+    ipmi_port: int
+    status: ServerStatus
+    power_state: PowerState
+
+
+# 服务器IPMI连接信息缓存: {server_id: ((ipmi_ip, ipmi_username, ipmi_password, ipmi_port), 过期时间)}
+# 稳定运行时每轮轮询无需再从数据库读取连接信息；连接信息变更或服务器删除时需调用 invalidate_credentials
+# 条目在 SCHEDULER_CREDENTIAL_CACHE_TTL 秒后过期，其他进程或直接改库造成的变更最长在该时间后生效
+_credential_cache: Dict[int, Tuple[Tuple[str, str, str, int], float]] = {}
+
+# 缓存失效计数：查询连接信息期间发生过失效时，查询结果可能已过时，不写入缓存
+_credential_generation = 0
+
+
+def invalidate_credentials(server_id: Optional[int] = None):
+    """清除服务器IPMI连接信息缓存，server_id 为空时清空全部"""
+    global _credential_generation
+    _credential_generation += 1
+    if server_id is None:
+        _credential_cache.clear()
+    else:
+        _credential_cache.pop(server_id, None)
+
+
+def _cached_credentials(server_id: int, now: float) -> Optional[Tuple[str, str, str, int]]:
+    """返回未过期的缓存连接信息，过期条目直接移除"""
+    entry = _credential_cache.get(server_id)
+    if entry is None:
+        return None
+    if entry[1] <= now:
+        del _credential_cache[server_id]
+        return None
+    return entry[0]
+
+
+class _PowerStateUpdate:
+    """单台服务器的电源状态刷新结果 (使用 __slots__ 降低大批量时的内存和属性访问开销)"""
+    __slots__ = ("id", "status", "power_state", "changed")
+
+    def __init__(self, server_id: int, status: ServerStatus, power_state: PowerState, changed: bool = True):
+        self.id = server_id
+        self.status = status
+        self.power_state = power_state
+        # 与数据库中现有状态相比是否发生变化，未变化的行无需写入
+        self.changed = changed
+
+
+def _to_update_params(updates: List[_PowerStateUpdate]) -> List[Dict[str, Any]]:
+    """在 executemany 边界统一转换为绑定参数字典"""
+    return [
+        {"b_id": u.id, "b_status": u.status, "b_power_state": u.power_state}
+        for u in updates
+    ]
+
+
 class PowerStateSchedulerService:
     """电源状态定时刷新服务"""
     
     def __init__(self):
-        self.scheduler = AsyncIOScheduler()
         self.is_running = False
-        self._refresh_job_id = "power_state_refresh"
         self.ipmi_service = IPMIService()  # 创建IPMI服务实例
         self._is_refreshing = False
         
-        # 限制并发数量，防止瞬间创建过多数据库连接导致连接池耗尽
+        # 周期刷新任务及下次执行时间 (使用 asyncio 循环代替 APScheduler 的 interval 任务)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._periodic_task: Optional[asyncio.Task] = None
+        self._next_run_at: Optional[datetime] = None
+        
+        # 单次刷新的定时句柄 (按任务ID去重) 及运行中的后台任务引用，防止任务被垃圾回收
+        self._pending_refreshes: Dict[str, asyncio.TimerHandle] = {}
+        self._background_tasks: Set[asyncio.Task] = set()
+        
+        # 限制数据库并发数量，防止瞬间创建过多数据库连接导致连接池耗尽
         # 建议值：数据库连接池大小 (pool_size) 的 50% ~ 80%
-        self._concurrency_limit = settings.SCHEDULER_CONCURRENCY_LIMIT
-        self._semaphore = asyncio.Semaphore(self._concurrency_limit)
+        self._db_semaphore = asyncio.Semaphore(settings.SCHEDULER_CONCURRENCY_LIMIT)
+        
+        # 限制IPMI并发数量，与数据库连接数相互独立，可按网络承载能力单独调整
+        self._ipmi_concurrency_limit = settings.SCHEDULER_IPMI_CONCURRENCY_LIMIT
+        self._ipmi_semaphore = asyncio.Semaphore(self._ipmi_concurrency_limit)
         
     async def start(self):
         """启动定时任务"""
@@ -38,23 +123,12 @@ class PowerStateSchedulerService:
             return
             
         try:
-            # 添加定时刷新任务
-            self.scheduler.add_job(
-                self.refresh_all_power_states,
-                "interval",
-                minutes=settings.POWER_STATE_REFRESH_INTERVAL,
-                id=self._refresh_job_id,
-                replace_existing=True,
-                max_instances=1,  # 防止任务重叠执行
-                coalesce=True      # 如果任务积压，只执行最后一次
-            )
-            
-            self.scheduler.start()
+            self._loop = asyncio.get_running_loop()
             self.is_running = True
-            logger.info(f"电源状态定时刷新服务已启动，刷新间隔：{settings.POWER_STATE_REFRESH_INTERVAL}分钟")
             
-            # 立即执行一次
-            asyncio.create_task(self.refresh_all_power_states())
+            # 启动周期刷新循环 (循环启动后立即执行首次刷新)
+            self._periodic_task = asyncio.create_task(self._periodic())
+            logger.info(f"电源状态定时刷新服务已启动，刷新间隔：{settings.POWER_STATE_REFRESH_INTERVAL}分钟")
             
         except Exception as e:
             logger.error(f"启动电源状态定时任务失败: {e}")
@@ -67,17 +141,45 @@ class PowerStateSchedulerService:
             return
             
         try:
+            self.is_running = False
+            
+            # 取消尚未触发的单次刷新
+            for handle in self._pending_refreshes.values():
+                handle.cancel()
+            self._pending_refreshes.clear()
+            
+            if self._periodic_task:
+                self._periodic_task.cancel()
+                await asyncio.gather(self._periodic_task, return_exceptions=True)
+                self._periodic_task = None
+            self._next_run_at = None
+            
             # 关闭IPMI服务，释放资源
             if hasattr(self, 'ipmi_service') and self.ipmi_service:
                 self.ipmi_service.close()
             
-            self.scheduler.shutdown(wait=False)
-            self.is_running = False
             logger.info("电源状态定时刷新服务已停止")
         except Exception as e:
             logger.error(f"停止电源状态定时任务失败: {e}")
             self.is_running = False
     
+    async def _periodic(self):
+        """周期刷新循环：启动后立即刷新一次，之后每隔 POWER_STATE_REFRESH_INTERVAL 分钟刷新所有服务器电源状态"""
+        interval = settings.POWER_STATE_REFRESH_INTERVAL * 60
+        while self.is_running:
+            # 本轮开始即确定下次执行时间，与刷新耗时无关
+            self._next_run_at = datetime.now() + timedelta(seconds=interval)
+            next_run = asyncio.get_running_loop().time() + interval
+            await self.refresh_all_power_states()
+            await asyncio.sleep(max(0, next_run - asyncio.get_running_loop().time()))
+    
+    def _spawn(self, coro) -> asyncio.Task:
+        """创建后台任务并保留引用，任务结束后自动移除"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+    
     async def refresh_all_power_states(self):
         """刷新所有服务器的电源状态"""
         # 防止上一轮任务执行时间过长导致重叠
@@ -87,54 +189,81 @@ class PowerStateSchedulerService:
             
         try:
             self._is_refreshing = True
-            start_time = datetime.now()
-            logger.debug(f"[电源状态刷新] 开始执行电源状态刷新任务")
-            
-            # 1. 快速获取所有在线服务器ID列表 (只读操作，用完即释放Session)
-            db_query_start = datetime.now()
-            target_server_ids = []
-            async with AsyncSessionLocal() as session:
-                # 仅查询在线服务器 ID，避免加载整个对象导致 Detached 错误
-                stmt = select(Server.id).where(Server.status == ServerStatus.ONLINE)
-                result = await session.execute(stmt)
-                target_server_ids = result.scalars().all()
-            db_query_time = (datetime.now() - db_query_start).total_seconds()
-            logger.debug(f"[电源状态刷新] 数据库查询耗时: {db_query_time:.3f}秒")
-            
-            if not target_server_ids:
-                logger.info("当前没有服务器，跳过电源状态刷新")
-                return
-
-            logger.info(f"开始刷新 {len(target_server_ids)} 台在线服务器的电源状态")
-
-            # 2. 并发刷新 (使用 Semaphore 限制并发)
-            tasks = []
-            for server_id in target_server_ids:
-                # 为每个任务创建协程
-                task = asyncio.create_task(self._refresh_single_server_safe(server_id))
-                tasks.append(task)
-            
-            # 3. 等待所有任务完成
-            # 设置总超时时间，防止任务无限挂起 (假设单台超时30s，计算总缓冲时间)
-            # 如果是并发执行，理论最大耗时 = (总数 / 并发数) * 单台超时
-            timeout = max(settings.MONITORING_DEFAULT_TIMEOUT, (len(target_server_ids) / self._concurrency_limit + 1.5) * settings.MONITORING_DEFAULT_TIMEOUT)
+            start_time = time.monotonic()
+            # 仅在开启 DEBUG 日志时计时，避免热路径上的无用开销
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug(f"[电源状态刷新] 开始执行电源状态刷新任务")
             
+            # 1. 流式读取所有在线服务器的IPMI连接信息，每取到一批即按凭据分桶放入队列
+            # 首批IPMI查询无需等待全部行加载完成，内存中最多只保留一个分区的行
+            # 固定数量的工作协程从队列中取桶查询，任务对象数量与服务器数量无关
+            # 使用 TaskGroup 管理工作协程：整体超时或异常时统一取消
+            db_query_start = time.monotonic()
+            total = 0
+            bucket_cnt = 0
+            worker_cnt = self._ipmi_concurrency_limit
+            queue: asyncio.Queue = asyncio.Queue()
+            updates: List[_PowerStateUpdate] = []
             try:
-                results = await asyncio.wait_for(
-                    asyncio.gather(*tasks, return_exceptions=True), 
-                    timeout=timeout
-                )
-            except asyncio.TimeoutError:
-                logger.error(f"电源状态刷新任务整体超时 ({timeout}s)，部分服务器状态可能未更新")
-                return
+                # 总超时在确定服务器数量后再设置
+                async with asyncio.timeout(None) as deadline:
+                    async with asyncio.TaskGroup() as tg:
+                        for _ in range(worker_cnt):
+                            tg.create_task(self._poll_worker(queue, updates))
+                        try:
+                            async with AsyncSessionLocal() as session:
+                                # 仅查询ID和当前状态 (用于跳过未变化的行)，连接信息优先从内存缓存获取
+                                stmt = select(
+                                    Server.id, Server.status, Server.power_state
+                                ).where(Server.status == ServerStatus.ONLINE).execution_options(yield_per=_STREAM_YIELD_PER)
+                                result = await session.stream(stmt)
+                                async for rows in result.partitions():
+                                    partition = await self._attach_credentials(rows)
+                                    total += len(partition)
+                                    # 2. 按凭据分桶后交给工作协程查询
+                                    # 同一凭据的服务器在一个子进程内批量查询，减少进程创建开销
+                                    # 查询过程不持有数据库连接，结果汇总后统一写入
+                                    for bucket in self._group_by_credentials(partition):
+                                        queue.put_nowait(bucket)
+                                        bucket_cnt += 1
+                        finally:
+                            # 通知工作协程队列已结束
+                            for _ in range(worker_cnt):
+                                queue.put_nowait(None)
+                        if debug:
+                            logger.debug(f"[电源状态刷新] 数据库查询耗时: {time.monotonic() - db_query_start:.3f}秒")
+                        
+                        if not total:
+                            logger.info("当前没有服务器，跳过电源状态刷新")
+                            return
+
+                        logger.info(f"开始刷新 {total} 台在线服务器的电源状态")
+                        
+                        # 3. 设置总超时时间，防止任务无限挂起
+                        # 单桶预算 = UDP探测超时 + 批量查询超时 (与 get_power_states_bulk 使用同一预算)，单桶内主机串行查询
+                        # 理论最大耗时 = 轮次 (桶数 / 并发数，向上取整) * 单桶预算，额外留一轮余量
+                        # 同时执行的桶数受轮询进程池大小限制，多出的工作协程只并发进行UDP探测
+                        bucket_size = min(settings.IPMI_BULK_POLL_SIZE, total)
+                        parallelism = min(worker_cnt, IPMIService.poll_concurrency())
+                        bucket_budget = settings.SERVER_ONLINE_CHECK_TIMEOUT + IPMIService.bulk_poll_timeout(bucket_size)
+                        timeout = (math.ceil(bucket_cnt / parallelism) + 1) * bucket_budget
+                        deadline.reschedule(asyncio.get_running_loop().time() + timeout)
+                        # 退出 TaskGroup 时等待所有工作协程完成
+            except TimeoutError:
+                # 已完成的桶结果照常写入，只有未完成的服务器本轮不更新
+                logger.error(f"电源状态刷新任务整体超时 ({timeout}s)，已完成 {len(updates)}/{total} 台，其余服务器状态本轮未更新")
 
-            # 统计结果
-            success_cnt = sum(1 for r in results if r is True)
-            error_cnt = len(target_server_ids) - success_cnt
+            # 4. 汇总所有已完成桶的结果，仅将状态发生变化的服务器一次性写入数据库
+            changed = [u for u in updates if u.changed]
+            if await self._flush_power_states(changed):
+                success_cnt = len(updates)
+            else:
+                success_cnt = len(updates) - len(changed)
+            failed_cnt = total - success_cnt
             
-            elapsed = (datetime.now() - start_time).total_seconds()
-            logger.info(f"电源状态刷新完成: 成功 {success_cnt}, 失败 {error_cnt}, 耗时 {elapsed:.2f}s")
-            logger.debug(f"[电源状态刷新] 任务执行完成，总耗时: {elapsed:.3f}秒")
+            elapsed = time.monotonic() - start_time
+            logger.info(f"电源状态刷新完成: 成功 {success_cnt} (状态变化 {len(changed)}), 失败 {failed_cnt}, 耗时 {elapsed:.2f}s")
                 
         except Exception as e:
             logger.error(f"定时刷新电源状态全局异常: {e}")
@@ -145,83 +274,206 @@ class PowerStateSchedulerService:
         """
         单个服务器刷新包装函数
         包含: 并发控制 + 独立的 Session 管理 + 异常处理
+        数据库读写与IPMI调用分别受各自的信号量限制，IPMI调用期间不持有数据库连接
         """
-        async with self._semaphore:  # 限制并发数
-            # [关键] 每个并发任务必须使用独立的 Session，严禁共享 Session
-            async with AsyncSessionLocal() as session:
-                server_fetch_start = datetime.now()
-                try:
-                    # 1. 获取服务器信息
-                    stmt = select(Server).where(Server.id == server_id)
+        try:
+            # 1. 获取服务器信息 (短时持有连接，读取后立即释放)
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                server_fetch_start = time.monotonic()
+            async with self._db_semaphore:
+                async with AsyncSessionLocal() as session:
+                    stmt = select(
+                        Server.ipmi_ip, Server.ipmi_username,
+                        Server.ipmi_password, Server.ipmi_port
+                    ).where(Server.id == server_id)
                     result = await session.execute(stmt)
-                    server = result.scalar_one_or_none()
-                    server_fetch_time = (datetime.now() - server_fetch_start).total_seconds()
-                    logger.debug(f"[电源状态刷新] 服务器 {server_id} 信息获取耗时: {server_fetch_time:.3f}秒")
-                    
-                    if not server:
-                        logger.warning(f"服务器不存在 (ID: {server_id})")
-                        return False
-                    
-                    # 2. 调用 IPMI 服务获取电源状态
-                    ipmi_start = datetime.now()
-                    power_state_str = await self.ipmi_service.get_power_state(
-                        ip=server.ipmi_ip,
-                        username=server.ipmi_username,
-                        password=server.ipmi_password,
-                        port=server.ipmi_port
-                    )
-                    ipmi_time = (datetime.now() - ipmi_start).total_seconds()
-                    logger.debug(f"[电源状态刷新] 服务器 {server_id} IPMI调用耗时: {ipmi_time:.3f}秒")
-                    
-                    # 3. 根据IPMI调用结果确定服务器在线状态和电源状态
-                    if power_state_str and power_state_str != "unknown":
-                        # IPMI调用成功，服务器在线
-                        server_status = ServerStatus.ONLINE
-                        
-                        # 转换电源状态
-                        try:
-                            new_power_state = PowerState(power_state_str.lower())
-                        except ValueError:
-                            logger.warning(f"无效的电源状态值: {power_state_str}")
-                            new_power_state = PowerState.UNKNOWN
-                    else:
-                        # IPMI调用失败，服务器离线，电源状态设为未知
-                        server_status = ServerStatus.OFFLINE
-                        new_power_state = PowerState.UNKNOWN
-                    
-                    # 4. 更新数据库
-                    db_update_start = datetime.now()
-                    stmt = update(Server).where(Server.id == server_id).values(
-                        status=server_status,
-                        power_state=new_power_state
-                    )
-                    await session.execute(stmt)
-                    await session.commit()
-                    db_update_time = (datetime.now() - db_update_start).total_seconds()
-                    logger.debug(f"[电源状态刷新] 服务器 {server_id} 数据库更新耗时: {db_update_time:.3f}秒")
-                    
-                    logger.debug(f"服务器 {server_id} 状态更新成功: 状态={server_status.value}, 电源={new_power_state.value}")
-                    return True
-                    
-                except Exception as e:
-                    await session.rollback()
-                    logger.error(f"刷新服务器 {server_id} 状态失败: {e}")
-                    return False
+                    server = result.one_or_none()
+            if debug:
+                logger.debug(f"[电源状态刷新] 服务器 {server_id} 信息获取耗时: {time.monotonic() - server_fetch_start:.3f}秒")
+            
+            if not server:
+                logger.warning(f"服务器不存在 (ID: {server_id})")
+                return False
+            
+            # 2. 调用 IPMI 服务获取电源状态
+            if debug:
+                ipmi_start = time.monotonic()
+            async with self._ipmi_semaphore:
+                power_state_str = await self.ipmi_service.get_power_state(
+                    ip=server.ipmi_ip,
+                    username=server.ipmi_username,
+                    password=server.ipmi_password,
+                    port=server.ipmi_port
+                )
+            if debug:
+                logger.debug(f"[电源状态刷新] 服务器 {server_id} IPMI调用耗时: {time.monotonic() - ipmi_start:.3f}秒")
+            
+            # 3. 根据IPMI调用结果确定服务器在线状态和电源状态
+            server_status, new_power_state = self._resolve_states(power_state_str)
+            
+            # 4. 更新数据库
+            if not await self._flush_power_states([_PowerStateUpdate(server_id, server_status, new_power_state)]):
+                return False
+            
+            logger.debug(f"服务器 {server_id} 状态更新成功: 状态={server_status.value}, 电源={new_power_state.value}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"刷新服务器 {server_id} 状态失败: {e}")
+            return False
+
+    async def _attach_credentials(self, rows) -> List["_PollTarget"]:
+        """为一批 (id, status, power_state) 行补全IPMI连接信息，缓存未命中的部分一次查询补齐"""
+        now = time.monotonic()
+        found = {}
+        misses = []
+        for row in rows:
+            creds = _cached_credentials(row.id, now)
+            if creds:
+                found[row.id] = creds
+            else:
+                misses.append(row.id)
+        if misses:
+            generation = _credential_generation
+            async with self._db_semaphore, AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(
+                        Server.id, Server.ipmi_ip, Server.ipmi_username,
+                        Server.ipmi_password, Server.ipmi_port
+                    ).where(Server.id.in_(misses))
+                )
+                fetched = {
+                    row.id: (row.ipmi_ip, row.ipmi_username, row.ipmi_password, row.ipmi_port)
+                    for row in result
+                }
+            found.update(fetched)
+            # 查询期间连接信息被修改并清除了缓存时，本轮仍使用查询结果，但不写入缓存，避免旧值长期驻留
+            if generation == _credential_generation:
+                expires_at = time.monotonic() + settings.SCHEDULER_CREDENTIAL_CACHE_TTL
+                for server_id, creds in fetched.items():
+                    _credential_cache[server_id] = (creds, expires_at)
+
+        targets = []
+        for row in rows:
+            creds = found.get(row.id)
+            if creds:  # 查询期间被删除的服务器直接跳过
+                targets.append(_PollTarget(row.id, *creds, row.status, row.power_state))
+        return targets
+
+    @staticmethod
+    def _resolve_states(power_state_str: Optional[str]) -> Tuple[ServerStatus, PowerState]:
+        """根据IPMI返回的电源状态字符串确定服务器在线状态和电源状态"""
+        if power_state_str and power_state_str != "unknown":
+            # IPMI调用成功，服务器在线
+            try:
+                return ServerStatus.ONLINE, PowerState(power_state_str.lower())
+            except ValueError:
+                logger.warning(f"无效的电源状态值: {power_state_str}")
+                return ServerStatus.ONLINE, PowerState.UNKNOWN
+        # IPMI调用失败，服务器离线，电源状态设为未知
+        return ServerStatus.OFFLINE, PowerState.UNKNOWN
+
+    @staticmethod
+    def _group_by_credentials(servers) -> List[list]:
+        """按IPMI凭据(用户名/密码/端口)对服务器分桶，每桶不超过 IPMI_BULK_POLL_SIZE 台"""
+        groups = defaultdict(list)
+        for row in servers:
+            groups[(row.ipmi_username, row.ipmi_password, row.ipmi_port)].append(row)
+
+        size = max(1, settings.IPMI_BULK_POLL_SIZE)
+        buckets = []
+        for rows in groups.values():
+            for i in range(0, len(rows), size):
+                buckets.append(rows[i:i + size])
+        return buckets
+
+    async def _poll_server_bucket(self, bucket) -> List[_PowerStateUpdate]:
+        """
+        查询同一凭据服务器桶的电源状态，仅做IPMI调用，不占用数据库连接
+        多台服务器在一个子进程内批量查询，返回各服务器的刷新结果
+        只轮询在线服务器，失败即标记为离线，离线服务器的恢复由离线服务器检查服务负责
+        """
+        updates = []
+
+        # 先用异步UDP探测过滤无响应的BMC，避免其占用进程池并耗尽整个IPMI超时
+        alive = await asyncio.gather(*(
+            self.ipmi_service.ping_bmc(row.ipmi_ip, row.ipmi_port) for row in bucket
+        ))
+        targets = []
+        for row, ok in zip(bucket, alive):
+            if ok:
+                targets.append(row)
+                continue
+            changed = (ServerStatus.OFFLINE, PowerState.UNKNOWN) != (row.status, row.power_state)
+            updates.append(_PowerStateUpdate(row.id, ServerStatus.OFFLINE, PowerState.UNKNOWN, changed))
+        if not targets:
+            return updates
+
+        async with self._ipmi_semaphore:  # 一个桶占用一个IPMI并发名额
+            first = targets[0]
+            try:
+                states = await self.ipmi_service.get_power_states_bulk(
+                    [row.ipmi_ip for row in targets],
+                    username=first.ipmi_username,
+                    password=first.ipmi_password,
+                    port=first.ipmi_port
+                )
+            except Exception as e:
+                logger.error(f"批量刷新服务器 {[row.id for row in targets]} 状态失败: {e}")
+                return updates
+
+        for row in targets:
+            server_status, new_power_state = self._resolve_states(states.get(row.ipmi_ip))
+            if server_status == ServerStatus.OFFLINE:
+                # BMC有响应但查询失败，可能是认证失败 (缓存的连接信息已过时)，下一轮重新从数据库读取
+                _credential_cache.pop(row.id, None)
+            changed = (server_status, new_power_state) != (row.status, row.power_state)
+            updates.append(_PowerStateUpdate(row.id, server_status, new_power_state, changed))
+        return updates
+
+    async def _poll_worker(self, queue: asyncio.Queue, updates: List[_PowerStateUpdate]):
+        """工作协程：循环从队列取出服务器桶查询，收到 None 时退出"""
+        while True:
+            bucket = await queue.get()
+            if bucket is None:
+                return
+            updates.extend(await self._poll_server_bucket(bucket))
+
+    async def _flush_power_states(self, updates: List[_PowerStateUpdate]) -> bool:
+        """将本轮所有刷新结果通过一次 executemany 写入数据库"""
+        if not updates:
+            return True
+        async with self._db_semaphore:
+            try:
+                debug = logger.isEnabledFor(logging.DEBUG)
+                if debug:
+                    db_update_start = time.monotonic()
+                # 仅写状态列，直接使用引擎事务，省去 Session/ORM 标识映射开销；异常时自动回滚
+                async with async_engine.begin() as conn:
+                    await conn.execute(_UPDATE_POWER_STATE, _to_update_params(updates))
+                # 状态变化后清除集群统计缓存 (server 模块导入了本模块，此处延迟导入避免循环引用)
+                from .server import invalidate_cluster_statistics
+                invalidate_cluster_statistics()
+                if debug:
+                    logger.debug(f"[电源状态刷新] 批量更新 {len(updates)} 台服务器状态耗时: {time.monotonic() - db_update_start:.3f}秒")
+                return True
+            except Exception as e:
+                logger.error(f"批量更新服务器电源状态失败: {e}")
+                return False
 
     def get_status(self) -> Dict[str, Any]:
         """获取定时任务状态"""
         try:
-            refresh_job = self.scheduler.get_job(self._refresh_job_id)
-            
             status = {
                 "running": self.is_running,
                 "power_refresh_enabled": settings.POWER_STATE_REFRESH_ENABLED,
                 "refresh_job": None
             }
             
-            if refresh_job:
+            if self._periodic_task and not self._periodic_task.done():
                 status["refresh_job"] = {
-                    "next_run": refresh_job.next_run_time.isoformat() if refresh_job.next_run_time else None,
+                    "next_run": self._next_run_at.isoformat() if self._next_run_at else None,
                     "interval_minutes": settings.POWER_STATE_REFRESH_INTERVAL
                 }
                 
@@ -249,6 +501,27 @@ class PowerStateSchedulerService:
         except Exception as e:
             logger.error(f"刷新服务器 {server_id} 电源状态时发生错误: {e}")
     
+    def _arm_refresh(self, job_id: str, server_id: int, delay: float):
+        """[事件循环线程] 登记单次刷新，同ID的旧任务会被替换"""
+        old_handle = self._pending_refreshes.pop(job_id, None)
+        if old_handle:
+            old_handle.cancel()
+        self._pending_refreshes[job_id] = self._loop.call_later(
+            delay, self._fire_refresh, job_id, server_id
+        )
+    
+    def _fire_refresh(self, job_id: str, server_id: int):
+        """[事件循环线程] 定时句柄触发，启动单次刷新任务"""
+        self._pending_refreshes.pop(job_id, None)
+        self._spawn(self._execute_single_server_refresh(server_id))
+    
+    def _schedule_refresh(self, job_id: str, server_id: int, delay: float):
+        """调度单次刷新，可在事件循环线程或工作线程中调用"""
+        if not self.is_running or self._loop is None:
+            logger.warning(f"电源状态定时刷新服务未运行，忽略服务器 {server_id} 的刷新调度")
+            return
+        self._loop.call_soon_threadsafe(self._arm_refresh, job_id, server_id, delay)
+    
     def schedule_single_refresh(self, server_id: int, delay: float = 0.5):
         """为特定服务器调度单次刷新任务
         
@@ -256,24 +529,7 @@ class PowerStateSchedulerService:
             server_id: 服务器ID
             delay: 延迟时间（秒），默认0.5秒
         """
-        # 生成唯一的任务ID
-        job_id = f"single_refresh_{server_id}"
-        
-        # 先移除可能存在的旧任务
-        try:
-            self.scheduler.remove_job(job_id)
-        except JobLookupError:
-            pass  # 任务不存在，忽略错误
-        
-        # 添加刷新任务
-        self.scheduler.add_job(
-            self._execute_single_server_refresh,
-            'date',
-            run_date=datetime.now() + timedelta(seconds=delay),
-            id=job_id,
-            replace_existing=True,
-            args=[server_id]
-        )
+        self._schedule_refresh(f"single_refresh_{server_id}", server_id, delay)
         
         logger.info(f"已为服务器 {server_id} 调度单次刷新任务，在 {delay} 秒后执行")
     
@@ -286,36 +542,9 @@ class PowerStateSchedulerService:
         # 生成唯一的任务ID
         job_id_base = f"server_refresh_{server_id}"
         
-        # 先移除可能存在的旧任务
-        try:
-            self.scheduler.remove_job(job_id_base + "_1")
-        except JobLookupError:
-            pass  # 任务不存在，忽略错误
-        
-        try:
-            self.scheduler.remove_job(job_id_base + "_2")
-        except JobLookupError:
-            pass  # 任务不存在，忽略错误
-        
-        # 添加第一次刷新任务（1秒后执行）
-        self.scheduler.add_job(
-            self._execute_single_server_refresh,
-            'date',
-            run_date=datetime.now() + timedelta(seconds=1),
-            id=job_id_base + "_1",
-            replace_existing=True,
-            args=[server_id]
-        )
-        
-        # 添加第二次刷新任务（4秒后执行）
-        self.scheduler.add_job(
-            self._execute_single_server_refresh,
-            'date',
-            run_date=datetime.now() + timedelta(seconds=4),
-            id=job_id_base + "_2",
-            replace_existing=True,
-            args=[server_id]
-        )
+        # 第一次刷新任务（1秒后执行），第二次刷新任务（4秒后执行）
+        self._schedule_refresh(job_id_base + "_1", server_id, 1)
+        self._schedule_refresh(job_id_base + "_2", server_id, 4)
         
         logger.info(f"已为服务器 {server_id} 调度刷新任务，在1秒和4秒后分别执行刷新")
 
@@ -1,22 +1,21 @@
-from typing import Optional, List, Union, Dict, Any
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from typing import Optional, List, Union, Dict, Any, Tuple, Set
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timezone
 import asyncio
-from concurrent.futures import as_completed
+import copy
+import time
 from collections import defaultdict
-from sqlalchemy import update, select
+from sqlalchemy import insert, update, delete, select, exists, func, Row, bindparam
 
 from app.models.server import Server, ServerGroup, ServerStatus, PowerState
 from app.schemas.server import ServerCreate, ServerUpdate, ServerGroupCreate, BatchOperationResult
 from app.services.ipmi import IPMIService
 from app.services.monitoring import MonitoringService
-from app.services.server_monitoring import PrometheusConfigManager
 from app.services.server_monitoring_service import ServerMonitoringService
 from app.core.exceptions import ValidationError, IPMIError
 from app.core.config import settings
-from app.services.scheduler_service import scheduler_service
+from app.services.scheduler_service import scheduler_service, invalidate_credentials
 import logging
 
 # 导入时间装饰器
@@ -24,10 +23,109 @@ from app.core.timing_decorator import timing_debug
 
 logger = logging.getLogger(__name__)
 
+# 服务器列表接口 (ServerResponse) 所需的列，不包含IPMI密码
+_SERVER_LIST_COLUMNS = (
+    Server.id, Server.name, Server.ipmi_ip, Server.ipmi_username, Server.ipmi_port,
+    Server.monitoring_enabled, Server.manufacturer, Server.model, Server.serial_number,
+    Server.description, Server.tags, Server.group_id, Server.status, Server.power_state,
+    Server.last_seen, Server.redfish_supported, Server.redfish_version,
+    Server.created_at, Server.updated_at,
+)
+
+# 集群统计结果缓存: {(是否异步版本, group_id): (过期时间, 统计结果)}
+# 仪表盘高频轮询时在短时间内复用同一结果，服务器或分组写入、后台状态刷新写入后立即清除
+_stats_cache: Dict[Tuple[bool, Optional[int]], Tuple[float, Dict[str, Any]]] = {}
+
+
+def invalidate_cluster_statistics():
+    """清除集群统计缓存"""
+    _stats_cache.clear()
+
+
+# ORM 更新/删除语句的执行选项：执行前未加载相关ORM实例，无需同步会话中的对象
+_NO_SYNC = {"synchronize_session": False}
+
+# 电源控制和状态刷新热路径上的预构建更新语句，绑定参数在执行时传入，不再每次调用重新构建语句
+# (Core 语句中绑定参数名不能与列名相同，因此使用 b_ 前缀)
+_servers_table = Server.__table__
+_UPDATE_LAST_SEEN = (
+    update(_servers_table)
+    .where(_servers_table.c.id == bindparam("b_id"))
+    .values(last_seen=func.now())
+)
+_UPDATE_STATUS_ERROR = (
+    update(_servers_table)
+    .where(_servers_table.c.id == bindparam("b_id"))
+    .values(status=ServerStatus.ERROR)
+)
+_UPDATE_STATUS_OFFLINE = (
+    update(_servers_table)
+    .where(_servers_table.c.id == bindparam("b_id"))
+    .values(status=ServerStatus.OFFLINE, power_state=PowerState.UNKNOWN)
+)
+_UPDATE_STATUS_ONLINE = (
+    update(_servers_table)
+    .where(_servers_table.c.id == bindparam("b_id"))
+    .values(status=ServerStatus.ONLINE, power_state=bindparam("b_power_state"), last_seen=func.now())
+)
+# 在线状态连同Redfish检查结果一起写入
+_UPDATE_STATUS_ONLINE_REDFISH = _UPDATE_STATUS_ONLINE.values(
+    redfish_supported=bindparam("b_redfish_supported"),
+    redfish_version=bindparam("b_redfish_version")
+)
+# 批量回写：ID列表使用展开绑定参数
+_UPDATE_LAST_SEEN_MANY = (
+    update(_servers_table)
+    .where(_servers_table.c.id.in_(bindparam("b_ids", expanding=True)))
+    .values(last_seen=func.now())
+)
+_UPDATE_STATUS_ERROR_MANY = (
+    update(_servers_table)
+    .where(_servers_table.c.id.in_(bindparam("b_ids", expanding=True)))
+    .values(status=ServerStatus.ERROR)
+)
+
+# 按名称/IPMI IP等非主键条件的查询语句同样预先构建（主键查询使用 Session.get，优先命中标识映射）
+_SELECT_SERVER_BY_NAME = select(Server).where(Server.name == bindparam("b_name"))
+_SELECT_SERVER_BY_IPMI_IP = select(Server).where(Server.ipmi_ip == bindparam("b_ipmi_ip"))
+_SELECT_IPMI_TARGET = select(
+    Server.id, Server.ipmi_ip, Server.ipmi_username, Server.ipmi_password, Server.ipmi_port
+).where(Server.id == bindparam("b_id"))
+_SELECT_GROUP_BY_NAME = select(ServerGroup).where(ServerGroup.name == bindparam("b_name"))
+
+# 服务器表上的唯一索引: (索引名, SQLite 错误信息中的 表名.列名, 冲突时的提示)
+_SERVER_UNIQUE_INDEXES = (
+    ("ix_servers_ipmi_ip", "servers.ipmi_ip", "IPMI IP地址已存在"),
+    ("ix_servers_name", "servers.name", "服务器名称已存在"),
+)
+
+# 批量操作中 IN (...) 子句每条语句最多携带的ID数，避免超出数据库绑定参数上限（旧版SQLite为999）
+_IN_CHUNK_SIZE = 500
+
+
+def _chunked(items: List[Any], size: int = _IN_CHUNK_SIZE):
+    """按固定大小切分列表"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# 集群统计中每个分组的计数项及其在计数列表中的下标
+_GROUP_STAT_KEYS = ('total', 'online', 'offline', 'unknown', 'power_on', 'power_off')
+_TOTAL, _ONLINE, _OFFLINE, _UNKNOWN, _POWER_ON, _POWER_OFF = range(len(_GROUP_STAT_KEYS))
+
 class ServerService:
+    # 后台监控配置任务的强引用集合（所有实例共享），防止任务执行中途被垃圾回收
+    _background_tasks: Set[asyncio.Task] = set()
+    
     def __init__(self, db: Union[Session, AsyncSession]):
         self.db = db
         self.ipmi_service = IPMIService()
+        # 服务实例（请求）范围内的分组缓存，重复按ID查询分组时不再访问数据库
+        self._group_cache: Dict[int, ServerGroup] = {}
+        # 服务实例（请求）范围内 名称/IPMI IP -> 服务器ID 的映射，命中后经会话标识映射取回实例，
+        # 同一请求内按名称或IP重复查询同一服务器时不再访问数据库
+        self._server_ids_by_name: Dict[str, int] = {}
+        self._server_ids_by_ip: Dict[str, int] = {}
         # 更安全的判断 session 类型
         is_async = isinstance(db, AsyncSession)
         self.async_db = db if is_async else None
@@ -40,10 +138,14 @@ class ServerService:
             self.monitoring_service = None
             self.server_monitoring_service = ServerMonitoringService(db)
         
-    def _get_utcnow(self):
-        """获取UTC时间"""
-        return datetime.now(timezone.utc)
-        
+    @classmethod
+    def _spawn(cls, coro) -> asyncio.Task:
+        """创建后台任务并保留引用，任务结束后自动移除"""
+        task = asyncio.create_task(coro)
+        cls._background_tasks.add(task)
+        task.add_done_callback(cls._background_tasks.discard)
+        return task
+    
     def _get_async_server_monitoring_service(self, async_db: AsyncSession):
         """获取异步服务器监控服务实例"""
         return ServerMonitoringService(async_db)
@@ -53,17 +155,44 @@ class ServerService:
         self.async_db = async_db
         self.server_monitoring_service = ServerMonitoringService(async_db)
     
+    @staticmethod
+    def _ipmi_kwargs(server: Union[Server, Row]) -> Dict[str, Any]:
+        """
+        服务器的IPMI连接参数，可直接展开传给 IPMIService 的 ip/username/password/port 参数，
+        也用于判断连接信息是否变化；同时支持ORM实例和只查询了IPMI列的行对象
+        """
+        return {
+            "ip": server.ipmi_ip or "",
+            "username": server.ipmi_username or "",
+            "password": server.ipmi_password or "",
+            "port": server.ipmi_port or settings.IPMI_DEFAULT_PORT,
+        }
+
+    def _dialect_supports(self, feature: str) -> bool:
+        """当前数据库方言是否支持指定特性（如 delete_returning、insert_executemany_returning）"""
+        return bool(getattr(self.async_db.get_bind().dialect, feature, False))
+
+    @staticmethod
+    def _unique_violation_error(e: IntegrityError) -> Exception:
+        """
+        将名称/IPMI IP唯一约束冲突转换为验证错误
+        按唯一索引名（SQLite 为 表名.列名）识别冲突字段；非空、外键等其他完整性错误原样返回，由调用方继续抛出
+        """
+        message = str(e.orig)
+        lowered = message.lower()
+        # SQLite: "UNIQUE constraint failed: servers.name"
+        # PostgreSQL: 'duplicate key value violates unique constraint "ix_servers_name"'
+        # MySQL: "Duplicate entry '...' for key 'ix_servers_name'"
+        if "unique constraint" not in lowered and "duplicate entry" not in lowered:
+            return e
+        for index_name, column_ref, error_message in _SERVER_UNIQUE_INDEXES:
+            if index_name in message or column_ref in message:
+                return ValidationError(error_message)
+        return e
+
     def create_server_sync(self, server_data: ServerCreate) -> Server:
         """创建服务器（同步版本）"""
-        # 检查服务器名称是否已存在
-        if self.get_server_by_name(server_data.name):
-            raise ValidationError("服务器名称已存在")
-        
-        # 检查IPMI IP是否已存在
-        if server_data.ipmi_ip and self.db.query(Server).filter(Server.ipmi_ip == server_data.ipmi_ip).first():
-            raise ValidationError("IPMI IP地址已存在")
-        
-        # 创建服务器
+        # 创建服务器，名称和IPMI IP的唯一性由数据库唯一约束保证
         db_server = Server(
             name=server_data.name,
             ipmi_ip=server_data.ipmi_ip,
@@ -80,26 +209,18 @@ class ServerService:
         )
         
         self.db.add(db_server)
-        self.db.commit()
-        self.db.refresh(db_server)
+        try:
+            self.db.commit()
+            invalidate_cluster_statistics()
+        except IntegrityError as e:
+            self.db.rollback()
+            raise self._unique_violation_error(e)
         return db_server
 
     @timing_debug
     async def create_server(self, server_data: ServerCreate) -> Server:
         """创建服务器"""
-        # 检查IPMI IP是否已存在
-        stmt = select(Server).where(Server.ipmi_ip == server_data.ipmi_ip)
-        result = await self.async_db.execute(stmt)
-        if result.scalar_one_or_none():
-            raise ValidationError("IPMI IP地址已存在")
-        
-        # 检查服务器名是否已存在
-        stmt = select(Server).where(Server.name == server_data.name)
-        result = await self.async_db.execute(stmt)
-        if result.scalar_one_or_none():
-            raise ValidationError("服务器名称已存在")
-        
-        # 创建服务器
+        # 创建服务器，名称和IPMI IP的唯一性由数据库唯一约束保证
         db_server = Server(
             name=server_data.name,
             ipmi_ip=server_data.ipmi_ip,
@@ -116,13 +237,17 @@ class ServerService:
         )
         
         self.async_db.add(db_server)
-        await self.async_db.commit()
-        await self.async_db.refresh(db_server)
+        try:
+            await self.async_db.commit()
+            invalidate_cluster_statistics()
+        except IntegrityError as e:
+            await self.async_db.rollback()
+            raise self._unique_violation_error(e)
         
         # 异步处理监控配置（仅在启用监控时）
         if settings.MONITORING_ENABLED and bool(db_server.monitoring_enabled):
             server_monitoring_service = self._get_async_server_monitoring_service(self.async_db)
-            asyncio.create_task(server_monitoring_service.on_server_added(db_server))
+            self._spawn(server_monitoring_service.on_server_added(db_server))
         
         # 调度服务器状态刷新任务（在0.5秒后执行）
         try:
@@ -136,25 +261,84 @@ class ServerService:
         
         return db_server
 
+    @timing_debug
+    async def bulk_create_servers(self, items: List[ServerCreate]) -> List[Server]:
+        """
+        批量创建服务器
+        所有服务器在一个事务中写入并只提交一次，支持批量 RETURNING 的数据库使用一条批量 INSERT ... RETURNING；
+        任一条违反名称/IPMI IP唯一约束时整批回滚并抛出验证错误，调用方应预先过滤已知冲突
+        """
+        if not items:
+            return []
+        
+        try:
+            if self._dialect_supports("insert_executemany_returning"):
+                result = await self.async_db.execute(
+                    insert(Server).returning(Server, sort_by_parameter_order=True),
+                    [item.model_dump() for item in items]
+                )
+                servers = result.scalars().all()
+            else:
+                # 不支持批量 RETURNING 的数据库（如MySQL）由工作单元在提交时写入并取回主键
+                servers = [Server(**item.model_dump()) for item in items]
+                self.async_db.add_all(servers)
+            await self.async_db.commit()
+            invalidate_cluster_statistics()
+        except IntegrityError as e:
+            await self.async_db.rollback()
+            raise self._unique_violation_error(e)
+        
+        # 启用监控的服务器合并为一个后台任务：有界并发创建openshub用户，Prometheus目标只同步一次
+        monitored = [server for server in servers if bool(server.monitoring_enabled)]
+        if settings.MONITORING_ENABLED and monitored:
+            server_monitoring_service = self._get_async_server_monitoring_service(self.async_db)
+            self._spawn(server_monitoring_service.on_servers_updated(
+                monitored, {server.id: False for server in monitored}
+            ))
+        
+        # 调度服务器状态刷新任务（在0.5秒后执行）
+        try:
+            if scheduler_service is not None:
+                for server in servers:
+                    scheduler_service.schedule_single_refresh(server.id, delay=0.5)
+                logger.info(f"批量创建 {len(servers)} 台服务器成功，已调度状态刷新任务")
+            else:
+                logger.warning(f"批量创建 {len(servers)} 台服务器成功，但调度服务未初始化，无法调度状态刷新任务")
+        except Exception as e:
+            logger.error(f"调度批量创建服务器的状态刷新任务失败: {e}")
+        
+        return servers
+
     def get_server(self, server_id: int) -> Optional[Server]:
-        """根据ID获取服务器"""
-        return self.db.query(Server).filter(Server.id == server_id).first()
+        """根据ID获取服务器（优先命中会话标识映射，避免重复查询）"""
+        return self.db.get(Server, server_id)
 
     async def get_server_async(self, server_id: int) -> Optional[Server]:
         """根据ID获取服务器（异步版本）"""
-        stmt = select(Server).where(Server.id == server_id)
-        result = await self.async_db.execute(stmt)
-        return result.scalar_one_or_none()
+        return await self.async_db.get(Server, server_id)
 
     def get_server_by_name(self, name: str) -> Optional[Server]:
         """根据名称获取服务器"""
         return self.db.query(Server).filter(Server.name == name).first()
 
+    async def _get_ipmi_target_async(self, server_id: int) -> Optional[Row]:
+        """获取服务器的IPMI连接信息 (id, ipmi_ip, ipmi_username, ipmi_password, ipmi_port)"""
+        result = await self.async_db.execute(_SELECT_IPMI_TARGET, {"b_id": server_id})
+        return result.first()
+
     async def get_server_by_name_async(self, name: str) -> Optional[Server]:
         """根据名称获取服务器（异步版本）"""
-        stmt = select(Server).where(Server.name == name)
-        result = await self.async_db.execute(stmt)
-        return result.scalar_one_or_none()
+        server_id = self._server_ids_by_name.get(name)
+        if server_id is not None:
+            db_server = await self.async_db.get(Server, server_id)
+            # 服务器可能已在本请求内被删除或改名，校验后再使用缓存结果
+            if db_server is not None and db_server.name == name:
+                return db_server
+        result = await self.async_db.execute(_SELECT_SERVER_BY_NAME, {"b_name": name})
+        db_server = result.scalar_one_or_none()
+        if db_server is not None:
+            self._server_ids_by_name[name] = db_server.id
+        return db_server
 
     def get_server_by_ipmi_ip(self, ipmi_ip: str) -> Optional[Server]:
         """根据IPMI IP获取服务器"""
@@ -162,9 +346,17 @@ class ServerService:
 
     async def get_server_by_ipmi_ip_async(self, ipmi_ip: str) -> Optional[Server]:
         """根据IPMI IP获取服务器（异步版本）"""
-        stmt = select(Server).where(Server.ipmi_ip == ipmi_ip)
-        result = await self.async_db.execute(stmt)
-        return result.scalar_one_or_none()
+        server_id = self._server_ids_by_ip.get(ipmi_ip)
+        if server_id is not None:
+            db_server = await self.async_db.get(Server, server_id)
+            # 服务器可能已在本请求内被删除或修改IP，校验后再使用缓存结果
+            if db_server is not None and db_server.ipmi_ip == ipmi_ip:
+                return db_server
+        result = await self.async_db.execute(_SELECT_SERVER_BY_IPMI_IP, {"b_ipmi_ip": ipmi_ip})
+        db_server = result.scalar_one_or_none()
+        if db_server is not None:
+            self._server_ids_by_ip[ipmi_ip] = db_server.id
+        return db_server
 
     def get_servers(self, skip: int = 0, limit: int = 100, group_id: Optional[int] = None) -> List[Server]:
         """获取服务器列表"""
@@ -175,16 +367,30 @@ class ServerService:
         
         return query.offset(skip).limit(limit).all()
 
-    async def get_servers_async(self, skip: int = 0, limit: int = 100, group_id: Optional[int] = None) -> List[Server]:
-        """获取服务器列表（异步版本）"""
-        stmt = select(Server)
+    async def get_servers_async(self, skip: int = 0, limit: int = 100, group_id: Optional[int] = None) -> List[Row]:
+        """
+        获取服务器列表（异步版本）
+        只读路径，仅查询列表响应所需的列并直接返回行对象，不构建ORM实例（不含IPMI密码）
+        """
+        stmt = select(*_SERVER_LIST_COLUMNS)
         
         if group_id is not None:
             stmt = stmt.where(Server.group_id == group_id)
             
         stmt = stmt.offset(skip).limit(limit)
         result = await self.async_db.execute(stmt)
-        return result.scalars().all()
+        return result.all()
+
+    async def get_servers_after_async(self, last_id: int, limit: int = 100, group_id: Optional[int] = None) -> List[Row]:
+        """按ID游标获取下一页服务器列表 (WHERE id > last_id ORDER BY id)，翻页深度不影响查询开销，返回列同 get_servers_async"""
+        stmt = select(*_SERVER_LIST_COLUMNS).where(Server.id > last_id)
+        
+        if group_id is not None:
+            stmt = stmt.where(Server.group_id == group_id)
+            
+        stmt = stmt.order_by(Server.id).limit(limit)
+        result = await self.async_db.execute(stmt)
+        return result.all()
 
     def update_server(self, server_id: int, server_data: ServerUpdate) -> Optional[Server]:
         """更新服务器信息"""
@@ -201,44 +407,27 @@ class ServerService:
         if "ipmi_password" in update_data and not update_data["ipmi_password"]:
             del update_data["ipmi_password"]
         
-        # 检查名称唯一性
-        if "name" in update_data and update_data["name"] != db_server.name:
-            if self.get_server_by_name(update_data["name"]):
-                raise ValidationError("服务器名称已存在")
-        
-        # 检查IPMI IP唯一性
-        if "ipmi_ip" in update_data and update_data["ipmi_ip"] != db_server.ipmi_ip:
-            if self.get_server_by_ipmi_ip(update_data["ipmi_ip"]):
-                raise ValidationError("IPMI IP地址已存在")
-        
         # 记录原始值用于比较
-        original_ipmi_ip = str(db_server.ipmi_ip) if db_server.ipmi_ip is not None else ""
-        original_ipmi_username = str(db_server.ipmi_username) if db_server.ipmi_username is not None else ""
-        original_ipmi_password = str(db_server.ipmi_password) if db_server.ipmi_password is not None else ""
-        original_ipmi_port = int(db_server.ipmi_port) if db_server.ipmi_port is not None else settings.IPMI_DEFAULT_PORT
+        original_ipmi = self._ipmi_kwargs(db_server)
         
         # 更新服务器信息
         for field, value in update_data.items():
             setattr(db_server, field, value)
         
-        self.db.commit()
-        self.db.refresh(db_server)
-        
-        # 检查IPMI相关信息是否发生变化
-        new_ipmi_ip = str(db_server.ipmi_ip) if db_server.ipmi_ip is not None else ""
-        new_ipmi_username = str(db_server.ipmi_username) if db_server.ipmi_username is not None else ""
-        new_ipmi_password = str(db_server.ipmi_password) if db_server.ipmi_password is not None else ""
-        new_ipmi_port = int(db_server.ipmi_port) if db_server.ipmi_port is not None else settings.IPMI_DEFAULT_PORT
-        
-        ipmi_changed = (
-            original_ipmi_ip != new_ipmi_ip or
-            original_ipmi_username != new_ipmi_username or
-            original_ipmi_password != new_ipmi_password or
-            original_ipmi_port != new_ipmi_port
-        )
+        # 检查IPMI相关信息是否发生变化（在提交前比较，避免提交后属性过期再次加载）
+        ipmi_changed = original_ipmi != self._ipmi_kwargs(db_server)
         
-        # 如果IPMI相关信息发生变化，调度服务器状态刷新任务
+        # 名称和IPMI IP的唯一性由数据库唯一约束保证
+        try:
+            self.db.commit()
+            invalidate_cluster_statistics()
+        except IntegrityError as e:
+            self.db.rollback()
+            raise self._unique_violation_error(e)
+        
+        # 如果IPMI相关信息发生变化，清除轮询的连接信息缓存并调度服务器状态刷新任务
         if ipmi_changed:
+            invalidate_credentials(db_server.id)
             try:
                 if scheduler_service is not None:
                     scheduler_service.schedule_single_refresh(db_server.id, delay=0.5)
@@ -250,7 +439,7 @@ class ServerService:
         
         # 异步处理监控配置更新（仅在启用监控时）
         if settings.MONITORING_ENABLED and (original_monitoring_enabled != bool(db_server.monitoring_enabled) or ipmi_changed):
-            asyncio.create_task(self.server_monitoring_service.on_server_updated(db_server, original_monitoring_enabled))
+            self._spawn(self.server_monitoring_service.on_server_updated(db_server, original_monitoring_enabled))
         
         return db_server
     
@@ -270,48 +459,27 @@ class ServerService:
         if "ipmi_password" in update_data and not update_data["ipmi_password"]:
             del update_data["ipmi_password"]
         
-        # 检查名称唯一性
-        if "name" in update_data and update_data["name"] != db_server.name:
-            stmt = select(Server).where(Server.name == update_data["name"])
-            result = await self.async_db.execute(stmt)
-            if result.scalar_one_or_none():
-                raise ValidationError("服务器名称已存在")
-        
-        # 检查IPMI IP唯一性
-        if "ipmi_ip" in update_data and update_data["ipmi_ip"] != db_server.ipmi_ip:
-            stmt = select(Server).where(Server.ipmi_ip == update_data["ipmi_ip"])
-            result = await self.async_db.execute(stmt)
-            if result.scalar_one_or_none():
-                raise ValidationError("IPMI IP地址已存在")
-        
         # 记录原始值用于比较
-        original_ipmi_ip = str(db_server.ipmi_ip) if db_server.ipmi_ip is not None else ""
-        original_ipmi_username = str(db_server.ipmi_username) if db_server.ipmi_username is not None else ""
-        original_ipmi_password = str(db_server.ipmi_password) if db_server.ipmi_password is not None else ""
-        original_ipmi_port = int(db_server.ipmi_port) if db_server.ipmi_port is not None else settings.IPMI_DEFAULT_PORT
+        original_ipmi = self._ipmi_kwargs(db_server)
         
         # 更新服务器信息
         for field, value in update_data.items():
             setattr(db_server, field, value)
         
-        await self.async_db.commit()
-        await self.async_db.refresh(db_server)
-        
-        # 检查IPMI相关信息是否发生变化
-        new_ipmi_ip = str(db_server.ipmi_ip) if db_server.ipmi_ip is not None else ""
-        new_ipmi_username = str(db_server.ipmi_username) if db_server.ipmi_username is not None else ""
-        new_ipmi_password = str(db_server.ipmi_password) if db_server.ipmi_password is not None else ""
-        new_ipmi_port = int(db_server.ipmi_port) if db_server.ipmi_port is not None else settings.IPMI_DEFAULT_PORT
-        
-        ipmi_changed = (
-            original_ipmi_ip != new_ipmi_ip or
-            original_ipmi_username != new_ipmi_username or
-            original_ipmi_password != new_ipmi_password or
-            original_ipmi_port != new_ipmi_port
-        )
+        # 检查IPMI相关信息是否发生变化（在提交前比较，避免提交后属性过期再次加载）
+        ipmi_changed = original_ipmi != self._ipmi_kwargs(db_server)
         
-        # 如果IPMI相关信息发生变化，调度服务器状态刷新任务
+        # 名称和IPMI IP的唯一性由数据库唯一约束保证
+        try:
+            await self.async_db.commit()
+            invalidate_cluster_statistics()
+        except IntegrityError as e:
+            await self.async_db.rollback()
+            raise self._unique_violation_error(e)
+        
+        # 如果IPMI相关信息发生变化，清除轮询的连接信息缓存并调度服务器状态刷新任务
         if ipmi_changed:
+            invalidate_credentials(db_server.id)
             try:
                 if scheduler_service is not None:
                     scheduler_service.schedule_single_refresh(db_server.id, delay=0.5)
@@ -324,7 +492,7 @@ class ServerService:
         # 异步处理监控配置更新（仅在启用监控时）
         if settings.MONITORING_ENABLED and (original_monitoring_enabled != bool(db_server.monitoring_enabled) or ipmi_changed):
             server_monitoring_service = self._get_async_server_monitoring_service(self.async_db)
-            asyncio.create_task(server_monitoring_service.on_server_updated(db_server, original_monitoring_enabled))
+            self._spawn(server_monitoring_service.on_server_updated(db_server, original_monitoring_enabled))
         
         return db_server
 
@@ -339,6 +507,8 @@ class ServerService:
         
         self.db.delete(db_server)
         self.db.commit()
+        invalidate_cluster_statistics()
+        invalidate_credentials(server_id)
         
         # 异步处理监控配置清理（仅在启用监控时）
         if settings.MONITORING_ENABLED and was_monitoring_enabled:
@@ -351,56 +521,74 @@ class ServerService:
     @timing_debug
     async def delete_server_async(self, server_id: int) -> bool:
         """异步删除服务器"""
-        db_server = await self.get_server_async(server_id)
-        if not db_server:
+        if self._dialect_supports("delete_returning"):
+            # 单条 DELETE ... RETURNING 同时完成存在性检查、删除和监控启用状态的读取，不预先加载服务器
+            result = await self.async_db.execute(
+                delete(Server).where(Server.id == server_id).returning(Server.monitoring_enabled)
+            )
+            row = result.first()
+        else:
+            # 不支持 RETURNING 的数据库（如MySQL）先只读取监控启用状态，再按ID删除
+            result = await self.async_db.execute(
+                select(Server.monitoring_enabled).where(Server.id == server_id)
+            )
+            row = result.first()
+            if row is not None:
+                await self.async_db.execute(
+                    delete(Server).where(Server.id == server_id), execution_options=_NO_SYNC
+                )
+        if row is None:
             return False
         
         # 记录服务器的监控启用状态
-        was_monitoring_enabled = bool(db_server.monitoring_enabled)
+        was_monitoring_enabled = bool(row.monitoring_enabled)
         
-        await self.async_db.delete(db_server)
         await self.async_db.commit()
+        invalidate_cluster_statistics()
+        invalidate_credentials(server_id)
         
         # 异步处理监控配置清理（仅在启用监控时）
         if settings.MONITORING_ENABLED and was_monitoring_enabled:
             server_monitoring_service = self._get_async_server_monitoring_service(self.async_db)
-            asyncio.create_task(server_monitoring_service.on_server_deleted(server_id))
+            self._spawn(server_monitoring_service.on_server_deleted(server_id))
         
         return True
 
     async def get_cluster_statistics_async(self, group_id: Optional[int] = None) -> Dict[str, Any]:
-        """获取集群统计信息（异步版本）"""
-        # 构建查询
-        stmt = select(Server)
+        """获取集群统计信息（异步版本，短时缓存）"""
+        cache_key = (True, group_id)
+        cached = self._get_cached_statistics(cache_key)
+        if cached is not None:
+            return cached
+        return self._store_statistics(cache_key, await self._compute_cluster_statistics_async(group_id))
+
+    async def _compute_cluster_statistics_async(self, group_id: Optional[int] = None) -> Dict[str, Any]:
+        """计算集群统计信息（异步版本）"""
+        # 在数据库中按 (状态, 电源状态, 分组, 厂商) 一次聚合计数，只返回少量计数行而非全部服务器
+        stmt = select(Server.status, Server.power_state, Server.group_id, Server.manufacturer, func.count(Server.id))
         if group_id is not None:
             stmt = stmt.where(Server.group_id == group_id)
-            
-        result = await self.async_db.execute(stmt)
-        servers = result.scalars().all()
+        result = await self.async_db.execute(
+            stmt.group_by(Server.status, Server.power_state, Server.group_id, Server.manufacturer)
+        )
+        rows = result.all()
+        if not rows:
+            return self._empty_cluster_statistics()
         
-        # 统计各类状态的服务器数量
         status_counts = defaultdict(int)
         power_state_counts = defaultdict(int)
-        total_count = len(servers)
-        
-        for server in servers:
-            status_counts[server.status.value] += 1
-            power_state_counts[server.power_state.value] += 1
-        
-        # 获取在线服务器的制造商分布
+        group_stats = defaultdict(int)
         manufacturer_counts = defaultdict(int)
-        online_servers = [s for s in servers if s.status == ServerStatus.ONLINE]
-        for server in online_servers:
-            manufacturer = server.manufacturer or "Unknown"
-            manufacturer_counts[manufacturer] += 1
+        total_count = 0
         
-        # 分组统计
-        group_stats = defaultdict(int)
-        for server in servers:
-            if server.group_id:
-                group_stats[str(server.group_id)] += 1
-            else:
-                group_stats["未分组"] += 1
+        for status, power_state, server_group_id, manufacturer, count in rows:
+            total_count += count
+            status_counts[status.value] += count
+            power_state_counts[power_state.value] += count
+            group_stats[str(server_group_id) if server_group_id else "未分组"] += count
+            # 厂商分布只统计在线服务器
+            if status == ServerStatus.ONLINE:
+                manufacturer_counts[manufacturer or "Unknown"] += count
         
         return {
             "total_servers": total_count,
@@ -413,118 +601,76 @@ class ServerService:
             "manufacturer_stats": dict(manufacturer_counts)
         }
 
-    async def _sync_monitoring_config(self):
-        """同步监控配置"""
-        logger.info("开始同步监控配置")
-        
-        try:
-            # 检查监控是否启用
-            if not settings.MONITORING_ENABLED:
-                logger.debug("监控功能未启用，跳过配置同步")
-                return
-                
-            logger.debug(f"监控功能已启用，开始同步配置")
-            
-            # 获取所有服务器
-            servers = self.get_servers()
-            logger.debug(f"获取到服务器列表，数量: {len(servers)}")
-            
-            # 同步Prometheus配置
-            prometheus_manager = PrometheusConfigManager()
-            logger.debug("创建PrometheusConfigManager实例")
-            
-            result = await prometheus_manager.sync_ipmi_targets(servers)
-            
-            if result:
-                logger.info("监控配置同步完成")
-            else:
-                logger.error("监控配置同步失败")
-                
-        except Exception as e:
-            logger.error(f"同步监控配置失败: {e}")
-            logger.exception(e)  # 记录完整的异常堆栈
-
     @timing_debug
     async def power_control(self, server_id: int, action: str) -> Dict[str, Any]:
         """服务器电源控制"""
-        # 使用异步方法获取服务器
-        db_server = await self.get_server_async(server_id)
+        # 仅查询IPMI连接所需的列，不加载ORM实例
+        db_server = await self._get_ipmi_target_async(server_id)
         if not db_server:
             raise ValidationError("服务器不存在")
         
         try:
-            result = await self.ipmi_service.power_control(
-                ip=str(db_server.ipmi_ip) if db_server.ipmi_ip is not None else "",
-                username=str(db_server.ipmi_username) if db_server.ipmi_username is not None else "",
-                password=str(db_server.ipmi_password) if db_server.ipmi_password is not None else "",
-                action=action,
-                port=int(str(db_server.ipmi_port)) if db_server.ipmi_port is not None else settings.IPMI_DEFAULT_PORT
-            )
+            result = await self.ipmi_service.power_control(action=action, **self._ipmi_kwargs(db_server))
             
-            # 使用异步方式更新服务器最后操作时间
-            stmt = update(Server).where(Server.id == server_id).values(
-                last_seen=self._get_utcnow()
-            )
-            await self.async_db.execute(stmt)
+            # 使用异步方式更新服务器最后操作时间，时间由数据库生成（与列默认值一致，均为UTC）
+            await self.async_db.execute(_UPDATE_LAST_SEEN, {"b_id": server_id})
             await self.async_db.commit()
             
             return result
             
         except IPMIError as e:
             # 使用异步方式更新服务器状态为错误
-            stmt = update(Server).where(Server.id == server_id).values(
-                status=ServerStatus.ERROR
-            )
-            await self.async_db.execute(stmt)
+            await self.async_db.execute(_UPDATE_STATUS_ERROR, {"b_id": server_id})
             await self.async_db.commit()
+            invalidate_cluster_statistics()
             raise e
 
     @timing_debug
     async def update_server_status(self, server_id: int) -> Dict[str, Any]:
         """更新服务器状态"""
-        # 使用异步方法获取服务器
-        db_server = await self.get_server_async(server_id)
+        # 仅查询IPMI连接所需的列，不加载ORM实例
+        db_server = await self._get_ipmi_target_async(server_id)
         if not db_server:
             raise ValidationError("服务器不存在")
         
         try:
-            # 先进行IPMI检查
-            # 获取电源状态
-            power_state = await self.ipmi_service.get_power_state(
-                ip=str(db_server.ipmi_ip) if db_server.ipmi_ip is not None else "",
-                username=str(db_server.ipmi_username) if db_server.ipmi_username is not None else "",
-                password=str(db_server.ipmi_password) if db_server.ipmi_password is not None else "",
-                port=int(str(db_server.ipmi_port)) if db_server.ipmi_port is not None else settings.IPMI_DEFAULT_PORT
-            )
+            # Redfish检查走HTTP，与IPMI检查相互独立，提前并发发起，总耗时取两者较大值
+            # （直接使用已查询到的IP，无需再次读取服务器）
+            redfish_task = asyncio.create_task(self.ipmi_service.check_redfish_support(
+                bmc_ip=db_server.ipmi_ip or "",
+                timeout=settings.REDFISH_TIMEOUT
+            ))
             
-            # 获取系统信息
-            system_info = await self.ipmi_service.get_system_info(
-                ip=str(db_server.ipmi_ip) if db_server.ipmi_ip is not None else "",
-                username=str(db_server.ipmi_username) if db_server.ipmi_username is not None else "",
-                password=str(db_server.ipmi_password) if db_server.ipmi_password is not None else "",
-                port=int(str(db_server.ipmi_port)) if db_server.ipmi_port is not None else settings.IPMI_DEFAULT_PORT
-            )
+            # 在同一个IPMI会话中获取电源状态和系统信息
+            try:
+                bundle = await self.ipmi_service.get_status_bundle(**self._ipmi_kwargs(db_server))
+            except BaseException:
+                # IPMI检查失败时不采用Redfish结果，取消尚未完成的检查
+                redfish_task.cancel()
+                raise
+            power_state = bundle["power_state"]
+            system_info = bundle["system_info"]
             
-            # IPMI检查成功，继续检查Redfish支持情况
-            redfish_info = await self.check_redfish_support(server_id)
+            redfish_info = await redfish_task
             
             # 准备更新数据库的值
-            power_state_enum = PowerState.ON if power_state == 'on' else PowerState.OFF
-            update_values = {
-                "status": ServerStatus.ONLINE,
-                "power_state": power_state_enum,
-                "last_seen": self._get_utcnow()
+            params = {
+                "b_id": server_id,
+                "b_power_state": PowerState.ON if power_state == 'on' else PowerState.OFF
             }
             
             # 只有在Redfish检查成功获得明确结果时，才更新Redfish相关字段
             if redfish_info.get("check_success", False):
-                update_values["redfish_supported"] = redfish_info.get("supported")
-                update_values["redfish_version"] = redfish_info.get("version") if redfish_info.get("supported") else None
+                params["b_redfish_supported"] = redfish_info.get("supported")
+                params["b_redfish_version"] = redfish_info.get("version") if redfish_info.get("supported") else None
+                stmt = _UPDATE_STATUS_ONLINE_REDFISH
+            else:
+                stmt = _UPDATE_STATUS_ONLINE
             
             # 使用异步方式更新服务器状态
-            stmt = update(Server).where(Server.id == server_id).values(**update_values)
-            await self.async_db.execute(stmt)
+            await self.async_db.execute(stmt, params)
             await self.async_db.commit()
+            invalidate_cluster_statistics()
             
             return {
                 "status": "success",
@@ -534,14 +680,10 @@ class ServerService:
             }
             
         except IPMIError as e:
-            # IPMI检查失败，更新服务器状态为离线或错误，不检查Redfish
-            stmt = update(Server).where(Server.id == server_id).values(
-                status=ServerStatus.OFFLINE,
-                power_state=PowerState.UNKNOWN
-                # 不更新redfish相关字段
-            )
-            await self.async_db.execute(stmt)
+            # IPMI检查失败，更新服务器状态为离线或错误，不检查Redfish（不更新redfish相关字段）
+            await self.async_db.execute(_UPDATE_STATUS_OFFLINE, {"b_id": server_id})
             await self.async_db.commit()
+            invalidate_cluster_statistics()
             
             return {
                 "status": "error",
@@ -565,7 +707,6 @@ class ServerService:
         
         self.db.add(db_group)
         self.db.commit()
-        self.db.refresh(db_group)
         return db_group
 
     async def create_server_group(self, group_data: ServerGroupCreate) -> ServerGroup:
@@ -577,18 +718,25 @@ class ServerService:
         
         self.async_db.add(db_group)
         await self.async_db.commit()
-        await self.async_db.refresh(db_group)
         return db_group
 
     def get_server_group(self, group_id: int) -> Optional[ServerGroup]:
-        """根据ID获取服务器分组"""
-        return self.db.query(ServerGroup).filter(ServerGroup.id == group_id).first()
+        """根据ID获取服务器分组（优先命中请求内缓存和会话标识映射，避免重复查询）"""
+        if group_id in self._group_cache:
+            return self._group_cache[group_id]
+        db_group = self.db.get(ServerGroup, group_id)
+        if db_group is not None:
+            self._group_cache[group_id] = db_group
+        return db_group
 
     async def get_server_group_async(self, group_id: int) -> Optional[ServerGroup]:
         """根据ID获取服务器分组（异步版本）"""
-        stmt = select(ServerGroup).where(ServerGroup.id == group_id)
-        result = await self.async_db.execute(stmt)
-        return result.scalar_one_or_none()
+        if group_id in self._group_cache:
+            return self._group_cache[group_id]
+        db_group = await self.async_db.get(ServerGroup, group_id)
+        if db_group is not None:
+            self._group_cache[group_id] = db_group
+        return db_group
 
     def get_server_group_by_name(self, name: str) -> Optional[ServerGroup]:
         """根据名称获取服务器分组"""
@@ -596,8 +744,7 @@ class ServerService:
 
     async def get_server_group_by_name_async(self, name: str) -> Optional[ServerGroup]:
         """根据名称获取服务器分组（异步版本）"""
-        stmt = select(ServerGroup).where(ServerGroup.name == name)
-        result = await self.async_db.execute(stmt)
+        result = await self.async_db.execute(_SELECT_GROUP_BY_NAME, {"b_name": name})
         return result.scalar_one_or_none()
 
     def get_server_groups(self, skip: int = 0, limit: int = 100) -> List[ServerGroup]:
@@ -618,134 +765,188 @@ class ServerService:
             
         # 检查分组名唯一性
         if group_data.name != db_group.name:
-            if self.get_server_group_by_name(group_data.name):
+            if self.db.execute(select(exists().where(ServerGroup.name == group_data.name))).scalar():
                 raise ValidationError("分组名称已存在")
         
         db_group.name = group_data.name
         db_group.description = group_data.description
+        self._group_cache.pop(group_id, None)
         
         self.db.commit()
-        self.db.refresh(db_group)
+        invalidate_cluster_statistics()
         return db_group
 
     async def update_server_group_async(self, group_id: int, group_data: ServerGroupCreate) -> Optional[ServerGroup]:
         """更新服务器分组（异步版本）"""
-        db_group = await self.get_server_group_async(group_id)
-        if not db_group:
-            return None
-            
-        # 检查分组名唯一性
-        if group_data.name != db_group.name:
-            stmt = select(ServerGroup).where(ServerGroup.name == group_data.name)
-            result = await self.async_db.execute(stmt)
-            if result.scalar_one_or_none():
-                raise ValidationError("分组名称已存在")
-        
-        db_group.name = group_data.name
-        db_group.description = group_data.description
+        # 分组名唯一性由数据库唯一约束保证
+        self._group_cache.pop(group_id, None)
+        try:
+            if self._dialect_supports("update_returning"):
+                # 单条 UPDATE ... RETURNING 完成存在性检查和更新并取回更新后的分组
+                result = await self.async_db.execute(
+                    update(ServerGroup)
+                    .where(ServerGroup.id == group_id)
+                    .values(name=group_data.name, description=group_data.description)
+                    .returning(ServerGroup)
+                )
+                db_group = result.scalar_one_or_none()
+            else:
+                # 不支持 RETURNING 的数据库（如MySQL）先加载分组再修改
+                db_group = await self.async_db.get(ServerGroup, group_id)
+                if db_group is not None:
+                    db_group.name = group_data.name
+                    db_group.description = group_data.description
+            if db_group is None:
+                await self.async_db.rollback()
+                return None
+            await self.async_db.commit()
+        except IntegrityError:
+            await self.async_db.rollback()
+            raise ValidationError("分组名称已存在")
         
-        await self.async_db.commit()
-        await self.async_db.refresh(db_group)
+        invalidate_cluster_statistics()
         return db_group
 
     def delete_server_group(self, group_id: int) -> bool:
         """删除服务器分组"""
-        db_group = self.get_server_group(group_id)
-        if not db_group:
+        # 同一事务内先解除服务器关联再删除分组，不预先查询分组，也不逐台加载分组下的服务器；
+        # 两条语句均跳过会话同步，不遍历标识映射中的服务器实例
+        self._group_cache.pop(group_id, None)
+        self.db.execute(update(Server).where(Server.group_id == group_id).values(group_id=None), execution_options=_NO_SYNC)
+        result = self.db.execute(delete(ServerGroup).where(ServerGroup.id == group_id), execution_options=_NO_SYNC)
+        if result.rowcount == 0:
+            self.db.rollback()
             return False
-            
-        self.db.delete(db_group)
         self.db.commit()
+        invalidate_cluster_statistics()
         return True
 
     async def delete_server_group_async(self, group_id: int) -> bool:
         """删除服务器分组（异步版本）"""
-        db_group = await self.get_server_group_async(group_id)
-        if not db_group:
+        # 同一事务内先解除服务器关联再删除分组，不预先查询分组，也不逐台加载分组下的服务器；
+        # 两条语句均跳过会话同步，不遍历标识映射中的服务器实例
+        self._group_cache.pop(group_id, None)
+        await self.async_db.execute(update(Server).where(Server.group_id == group_id).values(group_id=None), execution_options=_NO_SYNC)
+        result = await self.async_db.execute(delete(ServerGroup).where(ServerGroup.id == group_id), execution_options=_NO_SYNC)
+        if result.rowcount == 0:
+            await self.async_db.rollback()
             return False
-            
-        await self.async_db.delete(db_group)
         await self.async_db.commit()
+        invalidate_cluster_statistics()
         return True
 
     # 批量操作功能
+    # 批量结果的字段均由服务端生成且类型已确定，统一使用 model_construct 跳过逐条的 Pydantic 校验
     @timing_debug
     async def batch_power_control(self, server_ids: List[int], action: str) -> List[BatchOperationResult]:
         """批量电源控制"""
-        results = []
+        if not server_ids:
+            return []
         
-        # 使用异步方式获取所有有效的服务器
-        stmt = select(Server).where(Server.id.in_(server_ids))
-        result = await self.async_db.execute(stmt)
-        servers = result.scalars().all()
+        # 去重并保留调用方传入的顺序，结果按该顺序返回
+        ordered_ids = list(dict.fromkeys(server_ids))
         
-        # 检查是否有不存在的服务器ID
-        found_ids = {int(str(server.id)) for server in servers}
-        missing_ids = set(server_ids) - found_ids
-        
-        # 为不存在的服务器添加错误结果
-        for missing_id in missing_ids:
-            results.append(BatchOperationResult(
-                server_id=missing_id,
-                server_name=f"服务器{missing_id}",
-                success=False,
-                message="失败",
-                error="服务器不存在"
-            ))
-        
-        # 创建并发任务列表
-        tasks = []
-        for server in servers:
-            task = self._single_power_control_async(server, action)  # 使用异步版本
-            tasks.append(task)
-        
-        # 并发执行所有任务，最大并发数为15
-        # 推荐配置：semaphore: 15（批量电源控制并发数，从10增加到15）
-        # 理由：适当增加并发数可以提高批量操作的执行效率，与数据库连接池大小协调，避免数据库成为瓶颈
-        semaphore = asyncio.Semaphore(15)
-        
-        async def limited_task(server, action):
-            async with semaphore:
-                return await self._single_power_control_async(server, action)  # 使用异步版本
-        
-        # 执行所有任务
-        task_results = await asyncio.gather(
-            *[limited_task(server, action) for server in servers],
-            return_exceptions=True
+        # 使用异步方式获取所有有效的服务器，仅查询电源控制所需的列；ID按批分块查询
+        stmt = select(
+            Server.id, Server.name, Server.ipmi_ip, Server.ipmi_username, Server.ipmi_password, Server.ipmi_port
         )
+        by_id = {}
+        for chunk in _chunked(ordered_ids):
+            result = await self.async_db.execute(stmt.where(Server.id.in_(chunk)))
+            by_id.update((server.id, server) for server in result.all())
+        
+        # 单次遍历：不存在的服务器直接写入错误结果，存在的服务器记录其结果位置
+        results: List[Optional[BatchOperationResult]] = [None] * len(ordered_ids)
+        servers = []
+        positions = []
+        for index, server_id in enumerate(ordered_ids):
+            server = by_id.get(server_id)
+            if server is None:
+                results[index] = BatchOperationResult.model_construct(
+                    server_id=server_id,
+                    server_name=f"服务器{server_id}",
+                    success=False,
+                    message="失败",
+                    error="服务器不存在"
+                )
+            else:
+                servers.append(server)
+                positions.append(index)
         
-        # 整理结果
-        for i, server in enumerate(servers):
-            if i < len(task_results):
-                if isinstance(task_results[i], Exception):
-                    results.append(BatchOperationResult(
-                        server_id=int(str(server.id)),
-                        server_name=str(server.name),
+        # 使用固定数量的工作协程消费队列，最大并发数为15
+        # 推荐配置：worker_count: 15（批量电源控制并发数，从10增加到15）
+        # 理由：适当增加并发数可以提高批量操作的执行效率，与数据库连接池大小协调，避免数据库成为瓶颈
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in zip(positions, servers):
+            queue.put_nowait(item)
+        worker_count = min(15, len(servers))
+        for _ in range(worker_count):
+            queue.put_nowait(None)
+        
+        # 工作协程只收集需要回写的服务器ID，结束后统一写库，避免并发协程共用同一会话提交
+        succeeded_ids: List[int] = []
+        failed_ids: List[int] = []
+        
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                index, server = item
+                try:
+                    results[index], ipmi_ok = await self._single_power_control_async(server, action)  # 使用异步版本
+                    if ipmi_ok is True:
+                        succeeded_ids.append(server.id)
+                    elif ipmi_ok is False:
+                        failed_ids.append(server.id)
+                except Exception as e:
+                    results[index] = BatchOperationResult.model_construct(
+                        server_id=server.id,
+                        server_name=server.name,
                         success=False,
                         message="失败",
-                        error=str(task_results[i])
-                    ))
-                else:
-                    results.append(task_results[i])
+                        error=str(e)
+                    )
+        
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(worker_count):
+                tg.create_task(worker())
+        
+        if succeeded_ids or failed_ids:
+            # 操作成功的服务器更新最后操作时间，IPMI失败的服务器标记为错误，仅提交一次
+            for chunk in _chunked(succeeded_ids):
+                await self.async_db.execute(_UPDATE_LAST_SEEN_MANY, {"b_ids": chunk})
+            for chunk in _chunked(failed_ids):
+                await self.async_db.execute(_UPDATE_STATUS_ERROR_MANY, {"b_ids": chunk})
+            await self.async_db.commit()
+            invalidate_cluster_statistics()
         
         return results
     
     async def batch_update_monitoring(self, server_ids: List[int], monitoring_enabled: bool) -> List[BatchOperationResult]:
         """批量更新服务器监控状态"""
+        if not server_ids:
+            return []
+        
         results = []
         
-        # 使用异步方式获取所有有效的服务器
-        stmt = select(Server).where(Server.id.in_(server_ids))
-        result = await self.async_db.execute(stmt)
-        servers = result.scalars().all()
+        # 使用异步方式获取所有有效的服务器，仅加载结果和后续创建openshub用户所需的列；ID按批分块查询
+        stmt = select(Server).options(load_only(
+            Server.id, Server.name, Server.monitoring_enabled,
+            Server.ipmi_ip, Server.ipmi_username, Server.ipmi_password, Server.ipmi_port
+        ))
+        servers = []
+        for chunk in _chunked(list(dict.fromkeys(server_ids))):
+            result = await self.async_db.execute(stmt.where(Server.id.in_(chunk)))
+            servers.extend(result.scalars().all())
         
         # 检查是否有不存在的服务器ID
-        found_ids = {int(str(server.id)) for server in servers}
+        found_ids = {server.id for server in servers}
         missing_ids = set(server_ids) - found_ids
         
         # 为不存在的服务器添加错误结果
         for missing_id in missing_ids:
-            results.append(BatchOperationResult(
+            results.append(BatchOperationResult.model_construct(
                 server_id=missing_id,
                 server_name=f"服务器{missing_id}",
                 success=False,
@@ -753,90 +954,78 @@ class ServerService:
                 error="服务器不存在"
             ))
         
-        # 更新每个服务器的监控状态
-        for server in servers:
-            try:
-                # 记录原始监控启用状态
-                original_monitoring_enabled = bool(server.monitoring_enabled)
-                
-                # 更新监控状态
-                setattr(server, 'monitoring_enabled', monitoring_enabled)
-                await self.async_db.commit()
-                await self.async_db.refresh(server)
-                
-                # 异步处理监控配置更新（仅在启用监控时）
-                if settings.MONITORING_ENABLED and original_monitoring_enabled != monitoring_enabled:
-                    server_monitoring_service = self._get_async_server_monitoring_service(self.async_db)
-                    asyncio.create_task(server_monitoring_service.on_server_updated(server, original_monitoring_enabled))
-                
-                results.append(BatchOperationResult(
-                    server_id=int(str(server.id)),
-                    server_name=str(server.name),
-                    success=True,
-                    message=f"监控状态已{'启用' if monitoring_enabled else '禁用'}"
-                ))
-                
-            except Exception as e:
-                await self.async_db.rollback()
-                results.append(BatchOperationResult(
-                    server_id=int(str(server.id)),
-                    server_name=str(server.name),
+        if not servers:
+            return results
+        
+        # 记录原始监控启用状态，再按批 UPDATE 更新所有服务器并只提交一次
+        originals = {server.id: bool(server.monitoring_enabled) for server in servers}
+        try:
+            for chunk in _chunked(list(originals)):
+                await self.async_db.execute(
+                    update(Server).where(Server.id.in_(chunk)).values(monitoring_enabled=monitoring_enabled)
+                )
+            await self.async_db.commit()
+        except Exception as e:
+            await self.async_db.rollback()
+            for server in servers:
+                results.append(BatchOperationResult.model_construct(
+                    server_id=server.id,
+                    server_name=server.name,
                     success=False,
                     message="失败",
                     error=str(e)
                 ))
+            return results
+        
+        # 异步处理监控配置更新（仅在启用监控时）：所有状态发生变化的服务器合并为一个后台任务，
+        # 其中openshub用户创建有界并发执行，Prometheus目标只同步一次
+        changed = [server for server in servers if originals[server.id] != monitoring_enabled]
+        if settings.MONITORING_ENABLED and changed:
+            server_monitoring_service = self._get_async_server_monitoring_service(self.async_db)
+            self._spawn(server_monitoring_service.on_servers_updated(changed, originals))
+        
+        for server in servers:
+            results.append(BatchOperationResult.model_construct(
+                server_id=server.id,
+                server_name=server.name,
+                success=True,
+                message=f"监控状态已{'启用' if monitoring_enabled else '禁用'}"
+            ))
         
         return results
     
-    async def _single_power_control_async(self, server: Server, action: str) -> BatchOperationResult:
-        """单个服务器电源控制（异步版本）"""
+    async def _single_power_control_async(self, server: Union[Server, Row], action: str) -> Tuple[BatchOperationResult, Optional[bool]]:
+        """
+        单个服务器电源控制（异步版本）
+        不写数据库，返回 (操作结果, IPMI是否成功)；内部错误时第二项为 None，表示无需回写
+        """
         try:
-            await self.ipmi_service.power_control(
-                ip=str(server.ipmi_ip) if server.ipmi_ip is not None else "",
-                username=str(server.ipmi_username) if server.ipmi_username is not None else "",
-                password=str(server.ipmi_password) if server.ipmi_password is not None else "",
-                action=action,
-                port=int(str(server.ipmi_port)) if server.ipmi_port is not None else settings.IPMI_DEFAULT_PORT
-            )
+            await self.ipmi_service.power_control(action=action, **self._ipmi_kwargs(server))
             
-            # 使用异步方式更新服务器最后操作时间
-            stmt = update(Server).where(Server.id == server.id).values(
-                last_seen=datetime.utcnow()
-            )
-            await self.async_db.execute(stmt)
-            await self.async_db.commit()
-            
-            return BatchOperationResult(
-                server_id=int(str(server.id)),
-                server_name=str(server.name),
+            return BatchOperationResult.model_construct(
+                server_id=server.id,
+                server_name=server.name,
                 success=True,
                 message=f"电源{action}操作成功"
-            )
+            ), True
             
         except IPMIError as e:
-            # 使用异步方式更新服务器状态为错误
-            stmt = update(Server).where(Server.id == server.id).values(
-                status=ServerStatus.ERROR
-            )
-            await self.async_db.execute(stmt)
-            await self.async_db.commit()
-            
-            return BatchOperationResult(
-                server_id=int(str(server.id)),
-                server_name=str(server.name),
+            return BatchOperationResult.model_construct(
+                server_id=server.id,
+                server_name=server.name,
                 success=False,
                 message="失败",
                 error=f"IPMI操作失败: {str(e)}"
-            )
+            ), False
         except Exception as e:
             logger.error(f"服务器 {server.id} 电源控制异常: {str(e)}")
-            return BatchOperationResult(
-                server_id=int(str(server.id)),
-                server_name=str(server.name),
+            return BatchOperationResult.model_construct(
+                server_id=server.id,
+                server_name=server.name,
                 success=False,
                 message="失败",
                 error=f"内部错误: {str(e)}"
-            )
+            ), None
 
     @timing_debug
     async def check_redfish_support(self, server_id: int) -> Dict[str, Any]:
@@ -849,7 +1038,7 @@ class ServerService:
         try:
             # 调用IPMI服务检查Redfish支持
             result = await self.ipmi_service.check_redfish_support(
-                bmc_ip=str(db_server.ipmi_ip) if db_server.ipmi_ip is not None else "",
+                bmc_ip=db_server.ipmi_ip or "",
                 timeout=settings.REDFISH_TIMEOUT
             )
             
@@ -909,9 +1098,9 @@ class ServerService:
             logger.debug(f"开始调用IPMI服务获取服务器 {server_id} 的LED状态")
             # 调用IPMI服务获取LED状态
             result = await self.ipmi_service.get_redfish_led_status(
-                bmc_ip=str(db_server.ipmi_ip) if db_server.ipmi_ip is not None else "",
-                username=str(db_server.ipmi_username) if db_server.ipmi_username is not None else "",
-                password=str(db_server.ipmi_password) if db_server.ipmi_password is not None else "",
+                bmc_ip=db_server.ipmi_ip or "",
+                username=db_server.ipmi_username or "",
+                password=db_server.ipmi_password or "",
                 timeout=settings.REDFISH_TIMEOUT
             )
             
@@ -981,9 +1170,9 @@ class ServerService:
             logger.debug(f"开始调用IPMI服务设置服务器 {server_id} 的LED状态为 {led_state}")
             # 调用IPMI服务设置LED状态
             result = await self.ipmi_service.set_redfish_led_state(
-                bmc_ip=str(db_server.ipmi_ip) if db_server.ipmi_ip is not None else "",
-                username=str(db_server.ipmi_username) if db_server.ipmi_username is not None else "",
-                password=str(db_server.ipmi_password) if db_server.ipmi_password is not None else "",
+                bmc_ip=db_server.ipmi_ip or "",
+                username=db_server.ipmi_username or "",
+                password=db_server.ipmi_password or "",
                 led_state=led_state,
                 timeout=settings.REDFISH_TIMEOUT
             )
@@ -1006,60 +1195,91 @@ class ServerService:
                 "message": f"设置LED状态失败: {str(e)}"
             }
 
+    @staticmethod
+    def _empty_cluster_statistics() -> Dict[str, Any]:
+        """没有任何服务器时的集群统计结果"""
+        return {
+            'total_servers': 0,
+            'online_servers': 0,
+            'offline_servers': 0,
+            'unknown_servers': 0,
+            'power_on_servers': 0,
+            'power_off_servers': 0,
+            'group_stats': {},
+            'manufacturer_stats': {}
+        }
+
+    @staticmethod
+    def _get_cached_statistics(key: Tuple[bool, Optional[int]]) -> Optional[Dict[str, Any]]:
+        """读取未过期的集群统计缓存，返回副本，调用方修改结果不影响缓存"""
+        entry = _stats_cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return copy.deepcopy(entry[1])
+        return None
+
+    @staticmethod
+    def _store_statistics(key: Tuple[bool, Optional[int]], stats: Dict[str, Any]) -> Dict[str, Any]:
+        """写入集群统计缓存，缓存保存副本"""
+        ttl = settings.CLUSTER_STATS_CACHE_TTL
+        if ttl > 0:
+            _stats_cache[key] = (time.monotonic() + ttl, copy.deepcopy(stats))
+        return stats
+
     def get_cluster_statistics(self, group_id: Optional[int] = None) -> Dict[str, Any]:
-        """获取集群统计信息"""
-        # 基本查询
-        query = self.db.query(Server)
+        """获取集群统计信息（短时缓存）"""
+        cache_key = (False, group_id)
+        cached = self._get_cached_statistics(cache_key)
+        if cached is not None:
+            return cached
+        return self._store_statistics(cache_key, self._compute_cluster_statistics(group_id))
+
+    def _compute_cluster_statistics(self, group_id: Optional[int] = None) -> Dict[str, Any]:
+        """计算集群统计信息"""
+        # 在数据库中按 (分组名称, 状态, 电源状态, 厂商) 一次聚合计数，只返回少量计数行而非全部服务器
+        query = self.db.query(
+            ServerGroup.name, Server.status, Server.power_state, Server.manufacturer, func.count(Server.id)
+        ).outerjoin(ServerGroup, Server.group_id == ServerGroup.id)
         if group_id is not None:
             query = query.filter(Server.group_id == group_id)
+        rows = query.group_by(ServerGroup.name, Server.status, Server.power_state, Server.manufacturer).all()
+        if not rows:
+            return self._empty_cluster_statistics()
         
-        servers = query.all()
-        
-        # 基础统计
-        total_servers = len(servers)
-        online_servers = sum(1 for s in servers if s.status == ServerStatus.ONLINE)
-        offline_servers = sum(1 for s in servers if s.status == ServerStatus.OFFLINE)
-        unknown_servers = sum(1 for s in servers if s.status == ServerStatus.UNKNOWN)
+        # 基础统计与电源状态统计
+        total_servers = online_servers = offline_servers = unknown_servers = 0
+        power_on_servers = power_off_servers = 0
         
-        # 电源状态统计
-        power_on_servers = sum(1 for s in servers if s.power_state == PowerState.ON)
-        power_off_servers = sum(1 for s in servers if s.power_state == PowerState.OFF)
-        
-        # 分组统计
-        group_stats = defaultdict(lambda: {
-            'total': 0,
-            'online': 0, 
-            'offline': 0,
-            'unknown': 0,
-            'power_on': 0,
-            'power_off': 0
-        })
+        # 分组统计：每个分组使用定长列表计数，按下标累加，返回前再转换为字典
+        group_counters: Dict[str, List[int]] = {}
+        manufacturer_stats = defaultdict(int)
         
-        for server in servers:
-            group_name = "未分组"
-            if server.group_id and server.group_id > 0:
-                group = self.get_server_group(server.group_id)
-                if group:
-                    group_name = group.name
-            
-            group_stats[group_name]['total'] += 1
-            if server.status == ServerStatus.ONLINE:
-                group_stats[group_name]['online'] += 1
-            elif server.status == ServerStatus.OFFLINE:
-                group_stats[group_name]['offline'] += 1
+        for group_name, status, power_state, manufacturer, count in rows:
+            manufacturer_stats[manufacturer if manufacturer is not None else "未知"] += count
+            name = group_name or "未分组"
+            stats = group_counters.get(name)
+            if stats is None:
+                stats = group_counters[name] = [0] * len(_GROUP_STAT_KEYS)
+            stats[_TOTAL] += count
+            total_servers += count
+            if status == ServerStatus.ONLINE:
+                stats[_ONLINE] += count
+                online_servers += count
+            elif status == ServerStatus.OFFLINE:
+                stats[_OFFLINE] += count
+                offline_servers += count
             else:
-                group_stats[group_name]['unknown'] += 1
+                stats[_UNKNOWN] += count
+                if status == ServerStatus.UNKNOWN:
+                    unknown_servers += count
             
-            if server.power_state == PowerState.ON:
-                group_stats[group_name]['power_on'] += 1
-            elif server.power_state == PowerState.OFF:
-                group_stats[group_name]['power_off'] += 1
+            if power_state == PowerState.ON:
+                stats[_POWER_ON] += count
+                power_on_servers += count
+            elif power_state == PowerState.OFF:
+                stats[_POWER_OFF] += count
+                power_off_servers += count
         
-        # 厂商统计
-        manufacturer_stats = defaultdict(int)
-        for server in servers:
-            manufacturer = str(server.manufacturer) if server.manufacturer is not None else "未知"
-            manufacturer_stats[manufacturer] += 1
+        group_stats = {name: dict(zip(_GROUP_STAT_KEYS, stats)) for name, stats in group_counters.items()}
         
         return {
             'total_servers': total_servers,
@@ -1068,6 +1288,6 @@ class ServerService:
             'unknown_servers': unknown_servers,
             'power_on_servers': power_on_servers,
             'power_off_servers': power_off_servers,
-            'group_stats': dict(group_stats),
+            'group_stats': group_stats,
             'manufacturer_stats': dict(manufacturer_stats)
         }
\ No newline at end of file
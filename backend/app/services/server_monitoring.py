@@ -1,6 +1,8 @@
+import asyncio
 import json
+import hashlib
 import logging
-from typing import List, Optional
+from typing import Dict, List, Optional
 import httpx
 import os
 import base64
@@ -12,10 +14,34 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Prometheus/Grafana 的服务实例按请求创建，HTTP 客户端放在模块级共享，复用到两者的 TCP 连接
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """获取共享的 Prometheus/Grafana HTTP 客户端"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=32))
+    return _http_client
+
+
+async def aclose_http_client():
+    """关闭共享的 Prometheus/Grafana HTTP 客户端（应用关闭时调用）"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 class PrometheusConfigManager:
     """Prometheus配置管理器"""
     
+    # 每个配置文件最近一次成功同步的目标指纹（所有实例共享），目标未变化时跳过写文件和重载
+    _synced_fingerprints: Dict[str, bytes] = {}
+    # 每个重载地址尚在防抖等待中的重载任务，窗口内的重载请求共享同一次重载结果
+    _pending_reloads: Dict[str, asyncio.Task] = {}
+    
     def __init__(self, config_path: Optional[str] = None):
         # 通过环境变量或配置文件获取配置路径，如果没有则使用默认值
         default_path = "/etc/prometheus/targets/ipmi-targets.json"
@@ -27,61 +53,64 @@ class PrometheusConfigManager:
         logger.debug(f"配置文件路径: {self.config_path}")
         logger.debug(f"Prometheus重载URL: {self.reload_url}")
     
-    async def sync_ipmi_targets(self, servers: List[Server]) -> bool:
-        """根据服务器列表同步IPMI监控目标"""
-        logger.info(f"开始同步Prometheus IPMI目标配置，服务器数量: {len(servers)}")
-        logger.debug(f"服务器列表详情: {[{'id': s.id, 'name': s.name, 'ipmi_ip': s.ipmi_ip} for s in servers]}")
+    @staticmethod
+    def build_ipmi_target(server_id, name, ipmi_ip, manufacturer) -> Dict:
+        """由 (id, name, ipmi_ip, manufacturer) 生成单台服务器的IPMI Exporter目标配置"""
+        # 处理可能为None的字段，确保转换为字符串
+        ipmi_ip = str(ipmi_ip) if ipmi_ip is not None else ""
+        manufacturer = str(manufacturer) if manufacturer is not None else "unknown"
         
+        # 为每个服务器生成IPMI Exporter配置
+        # 正确的配置应该是让Prometheus连接IPMI Exporter容器，而不是直接连接目标服务器
+        return {
+            "targets": ["ipmi-exporter:9290"],  # IPMI Exporter服务地址
+            "labels": {
+                "server_id": str(server_id),
+                "server_name": str(name),
+                "module": "remote",  # 指定使用remote模块
+                "ipmi_ip": ipmi_ip,
+                "manufacturer": manufacturer,
+                "__param_target": ipmi_ip  # 目标服务器IPMI地址作为参数传递
+                # 移除用户名、密码、端口、权限等参数
+            }
+        }
+    
+    async def sync_ipmi_targets(self, targets: List[Dict]) -> bool:
+        """
+        同步IPMI监控目标
+        targets 为 build_ipmi_target 生成的目标配置，调用方可边流式查询边生成，无需保留全部服务器行
+        """
+        logger.info(f"开始同步Prometheus IPMI目标配置，服务器数量: {len(targets)}")
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         try:
-            # 生成目标配置 - 为IPMI Exporter生成正确的配置格式
-            targets = []
-            for server in servers:
-                # 处理可能为None的字段，确保转换为字符串
-                ipmi_ip = str(server.ipmi_ip) if server.ipmi_ip is not None else ""
-                manufacturer = str(server.manufacturer) if server.manufacturer is not None else "unknown"
-                
-                # 为每个服务器生成IPMI Exporter配置
-                # 正确的配置应该是让Prometheus连接IPMI Exporter容器，而不是直接连接目标服务器
-                target = {
-                    "targets": ["ipmi-exporter:9290"],  # IPMI Exporter服务地址
-                    "labels": {
-                        "server_id": str(server.id),
-                        "server_name": str(server.name),
-                        "module": "remote",  # 指定使用remote模块
-                        "ipmi_ip": ipmi_ip,
-                        "manufacturer": manufacturer,
-                        "__param_target": ipmi_ip  # 目标服务器IPMI地址作为参数传递
-                        # 移除用户名、密码、端口、权限等参数
-                    }
-                }
-                
-                # 记录每个服务器的配置详情（调试模式）
-                logger.debug(f"服务器 {server.name} (ID: {server.id}) 的监控配置: {target}")
-                targets.append(target)
+            if debug_enabled:
+                for target in targets:
+                    labels = target["labels"]
+                    logger.debug(f"服务器 {labels['server_name']} (ID: {labels['server_id']}) 的监控配置: {target}")
             
             logger.info(f"生成监控目标配置完成，共 {len(targets)} 个目标")
             
-            # 写入配置文件到文件系统
+            # 只序列化一次，指纹和写入文件共用同一份内容；紧凑格式序列化更快、文件更小，
+            # 仅在调试日志开启时保留缩进便于人工查看
+            if debug_enabled:
+                payload = json.dumps(targets, indent=2, ensure_ascii=False).encode('utf-8')
+            else:
+                payload = json.dumps(targets, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+            
+            # 目标内容与上次成功同步时一致且文件仍存在，则无需重写配置和通知重载
+            fingerprint = hashlib.blake2b(payload, digest_size=16).digest()
+            if (PrometheusConfigManager._synced_fingerprints.get(self.config_path) == fingerprint
+                    and os.path.exists(self.config_path)):
+                logger.info("Prometheus监控目标未变化，跳过配置写入和重载")
+                return True
+            
+            # 写入配置文件到文件系统（在线程中执行，避免磁盘IO阻塞事件循环）
             try:
-                # 确保目录存在
-                config_dir = os.path.dirname(self.config_path)
-                os.makedirs(config_dir, exist_ok=True)
-                logger.debug(f"确保配置目录存在: {config_dir}")
-                
-                # 写入JSON配置文件
-                with open(self.config_path, 'w', encoding='utf-8') as f:
-                    json.dump(targets, f, indent=2, ensure_ascii=False)
+                file_size = await asyncio.to_thread(self._write_targets_file, payload)
                 
                 logger.info(f"成功写入Prometheus目标配置文件: {self.config_path}")
                 logger.debug(f"配置内容: {targets}")
-                
-                # 验证文件是否成功写入
-                if os.path.exists(self.config_path):
-                    file_size = os.path.getsize(self.config_path)
-                    logger.debug(f"配置文件大小: {file_size} 字节")
-                else:
-                    logger.error(f"配置文件写入失败，文件不存在: {self.config_path}")
-                    return False
+                logger.debug(f"配置文件大小: {file_size} 字节")
                     
             except Exception as e:
                 logger.error(f"写入Prometheus配置文件失败: {e}")
@@ -89,8 +118,10 @@ class PrometheusConfigManager:
                 return False
             
             # 通知Prometheus重新加载配置
-            reload_result = await self.reload_prometheus()
+            reload_result = await self._debounced_reload()
             if reload_result:
+                # 仅在重载成功后记录指纹，重载失败时下次同步仍会重试
+                PrometheusConfigManager._synced_fingerprints[self.config_path] = fingerprint
                 logger.info("Prometheus配置同步和重载完成")
             else:
                 logger.warning("Prometheus配置同步完成，但重载失败")
@@ -102,22 +133,61 @@ class PrometheusConfigManager:
             logger.exception(e)  # 记录完整的异常堆栈
             return False
     
+    def _write_targets_file(self, payload: bytes) -> int:
+        """
+        写入目标配置文件并返回文件大小
+        先写临时文件再原子替换，Prometheus 不会读到写了一半的配置
+        """
+        # 确保目录存在
+        config_dir = os.path.dirname(self.config_path)
+        os.makedirs(config_dir, exist_ok=True)
+        
+        tmp_path = f"{self.config_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, self.config_path)
+        return os.path.getsize(self.config_path)
+    
+    async def _debounced_reload(self) -> bool:
+        """在防抖窗口内合并多次重载请求，只向Prometheus发送一次重载"""
+        delay = settings.PROMETHEUS_RELOAD_DEBOUNCE_MS / 1000
+        if delay <= 0:
+            return await self.reload_prometheus()
+        
+        task = PrometheusConfigManager._pending_reloads.get(self.reload_url)
+        if task is None:
+            task = asyncio.create_task(self._reload_after(delay))
+            PrometheusConfigManager._pending_reloads[self.reload_url] = task
+        else:
+            logger.debug("已有等待中的Prometheus重载，合并本次重载请求")
+        # 屏蔽单个调用方的取消，避免影响共享同一重载任务的其他调用方
+        return await asyncio.shield(task)
+    
+    async def _reload_after(self, delay: float) -> bool:
+        """等待防抖窗口结束后执行重载"""
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            # 窗口结束即移除，之后写入的配置会触发新的重载
+            PrometheusConfigManager._pending_reloads.pop(self.reload_url, None)
+        return await self.reload_prometheus()
+    
     async def reload_prometheus(self) -> bool:
         """通知Prometheus重新加载配置"""
         logger.debug(f"开始通知Prometheus重新加载配置: {self.reload_url}")
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.reload_url)
-                logger.debug(f"Prometheus重载响应状态码: {response.status_code}")
-                
-                if response.status_code == 200:
-                    logger.info("Prometheus配置重载成功")
-                    return True
-                else:
-                    logger.error(f"Prometheus配置重载失败，状态码: {response.status_code}")
-                    logger.debug(f"响应内容: {response.text}")
-                    return False
+            client = _get_http_client()
+            response = await client.post(self.reload_url)
+            logger.debug(f"Prometheus重载响应状态码: {response.status_code}")
+            
+            if response.status_code == 200:
+                logger.info("Prometheus配置重载成功")
+                return True
+            else:
+                logger.error(f"Prometheus配置重载失败，状态码: {response.status_code}")
+                logger.debug(f"响应内容: {response.text}")
+                return False
         except Exception as e:
             logger.error(f"Prometheus重载请求失败: {e}")
             logger.exception(e)  # 记录完整的异常堆栈
@@ -153,41 +223,41 @@ class GrafanaService:
         logger.info(f"获取Grafana仪表板信息，UID: {dashboard_uid}")
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.grafana_url}/api/dashboards/uid/{dashboard_uid}",
-                    headers=self.headers
-                )
-                
-                logger.debug(f"Grafana API响应状态码: {response.status_code}")
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    logger.info(f"成功获取仪表板信息")
-                    logger.debug(f"仪表板详情: {result}")
-                    return {
-                        "success": True,
-                        "dashboard": result,
-                        "dashboard_uid": result.get('dashboard', {}).get('uid', dashboard_uid),
-                        "dashboard_url": f"{self.grafana_url}/d/{result.get('dashboard', {}).get('uid', dashboard_uid)}"
-                    }
-                elif response.status_code == 404:
-                    logger.info(f"仪表板不存在: {dashboard_uid}")
-                    return {
-                        "success": False,
-                        "dashboard_uid": dashboard_uid,
-                        "dashboard_url": f"{self.grafana_url}/d/{dashboard_uid}",
-                        "error": "Dashboard not found"
-                    }
-                else:
-                    logger.error(f"Grafana API错误，状态码: {response.status_code}")
-                    logger.debug(f"响应内容: {response.text}")
-                    return {
-                        "success": False,
-                        "dashboard_uid": dashboard_uid,
-                        "dashboard_url": f"{self.grafana_url}/d/{dashboard_uid}",
-                        "error": f"Grafana API error: {response.status_code}"
-                    }
+            client = _get_http_client()
+            response = await client.get(
+                f"{self.grafana_url}/api/dashboards/uid/{dashboard_uid}",
+                headers=self.headers
+            )
+            
+            logger.debug(f"Grafana API响应状态码: {response.status_code}")
+            
+            if response.status_code == 200:
+                result = response.json()
+                logger.info(f"成功获取仪表板信息")
+                logger.debug(f"仪表板详情: {result}")
+                return {
+                    "success": True,
+                    "dashboard": result,
+                    "dashboard_uid": result.get('dashboard', {}).get('uid', dashboard_uid),
+                    "dashboard_url": f"{self.grafana_url}/d/{result.get('dashboard', {}).get('uid', dashboard_uid)}"
+                }
+            elif response.status_code == 404:
+                logger.info(f"仪表板不存在: {dashboard_uid}")
+                return {
+                    "success": False,
+                    "dashboard_uid": dashboard_uid,
+                    "dashboard_url": f"{self.grafana_url}/d/{dashboard_uid}",
+                    "error": "Dashboard not found"
+                }
+            else:
+                logger.error(f"Grafana API错误，状态码: {response.status_code}")
+                logger.debug(f"响应内容: {response.text}")
+                return {
+                    "success": False,
+                    "dashboard_uid": dashboard_uid,
+                    "dashboard_url": f"{self.grafana_url}/d/{dashboard_uid}",
+                    "error": f"Grafana API error: {response.status_code}"
+                }
         except Exception as e:
             logger.error(f"获取Grafana仪表板信息失败: {e}")
             logger.exception(e)  # 记录完整的异常堆栈
@@ -232,39 +302,39 @@ class GrafanaService:
         logger.debug(f"仪表板配置: {dashboard_json}")
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.grafana_url}/api/dashboards/db",
-                    headers=self.headers,
-                    json=dashboard_json
-                )
+            client = _get_http_client()
+            response = await client.post(
+                f"{self.grafana_url}/api/dashboards/db",
+                headers=self.headers,
+                json=dashboard_json
+            )
+            
+            logger.debug(f"Grafana API响应状态码: {response.status_code}")
+            
+            if response.status_code == 200:
+                result = response.json()
+                logger.info(f"服务器 {server_id} 的Grafana仪表板创建成功")
+                logger.debug(f"仪表板详情: {result}")
                 
-                logger.debug(f"Grafana API响应状态码: {response.status_code}")
+                # 获取实际创建的仪表板UID
+                actual_uid = result.get('uid', dashboard_uid)
+                logger.info(f"仪表板实际UID: {actual_uid}, 预期UID: {dashboard_uid}")
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    logger.info(f"服务器 {server_id} 的Grafana仪表板创建成功")
-                    logger.debug(f"仪表板详情: {result}")
-                    
-                    # 获取实际创建的仪表板UID
-                    actual_uid = result.get('uid', dashboard_uid)
-                    logger.info(f"仪表板实际UID: {actual_uid}, 预期UID: {dashboard_uid}")
-                    
-                    return {
-                        "success": True,
-                        "dashboard_uid": actual_uid,
-                        "dashboard_url": f"{self.grafana_url}/d/{actual_uid}"
-                    }
-                else:
-                    logger.error(f"Grafana API错误，状态码: {response.status_code}")
-                    logger.debug(f"响应内容: {response.text}")
-                    # 即使API调用失败，也返回默认的仪表板信息
-                    return {
-                        "success": False,
-                        "dashboard_uid": dashboard_uid,
-                        "dashboard_url": f"{self.grafana_url}/d/{dashboard_uid}",
-                        "error": f"Grafana API error: {response.status_code}"
-                    }
+                return {
+                    "success": True,
+                    "dashboard_uid": actual_uid,
+                    "dashboard_url": f"{self.grafana_url}/d/{actual_uid}"
+                }
+            else:
+                logger.error(f"Grafana API错误，状态码: {response.status_code}")
+                logger.debug(f"响应内容: {response.text}")
+                # 即使API调用失败，也返回默认的仪表板信息
+                return {
+                    "success": False,
+                    "dashboard_uid": dashboard_uid,
+                    "dashboard_url": f"{self.grafana_url}/d/{dashboard_uid}",
+                    "error": f"Grafana API error: {response.status_code}"
+                }
         except Exception as e:
             logger.error(f"创建Grafana仪表板失败: {e}")
             logger.exception(e)  # 记录完整的异常堆栈
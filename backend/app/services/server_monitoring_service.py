@@ -1,7 +1,10 @@
+import asyncio
 import logging
-from typing import List, Optional
-from sqlalchemy import select
+import weakref
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+from sqlalchemy import Row, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import AsyncSessionLocal
 from app.models.server import Server
 from app.services.ipmi import IPMIService
 from app.services.server_monitoring import PrometheusConfigManager, GrafanaService
@@ -9,6 +12,45 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# 生成Prometheus监控目标只需要这几列，不加载IPMI密码、描述、标签等其他字段
+_TARGET_COLUMNS = (Server.id, Server.name, Server.ipmi_ip, Server.manufacturer)
+
+# 流式读取启用监控的服务器时每个分区的行数
+_STREAM_YIELD_PER = 500
+
+
+class _TargetSyncCoalescer:
+    """
+    合并同一事件循环内的Prometheus目标同步请求
+    没有同步在执行时立即开始；执行期间到达的请求共享其结束后的下一次同步，
+    一波并发变更最多触发两次同步，且每个请求都会被一次在其之后开始的同步覆盖
+    """
+
+    def __init__(self):
+        self._current: Optional[asyncio.Task] = None
+        self._queued: Optional[asyncio.Task] = None
+
+    async def request(self, sync: Callable[[], Awaitable[bool]]) -> bool:
+        """请求一次同步，返回覆盖本次请求的那次同步的结果"""
+        if self._queued is not None:
+            task = self._queued
+        elif self._current is None or self._current.done():
+            task = self._current = asyncio.create_task(sync())
+        else:
+            task = self._queued = asyncio.create_task(self._run_next(self._current, sync))
+        # 屏蔽单个请求方的取消，避免影响共享同一同步任务的其他请求方
+        return await asyncio.shield(task)
+
+    async def _run_next(self, previous: asyncio.Task, sync: Callable[[], Awaitable[bool]]) -> bool:
+        """等待正在执行的同步结束后再同步一次，开始执行后新的请求排入再下一次"""
+        await asyncio.wait([previous])
+        self._current, self._queued = self._queued, None
+        return await sync()
+
+
+# 每个事件循环各自的同步合并器，任务只在创建它的事件循环中使用；事件循环销毁后自动移除
+_sync_coalescers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _TargetSyncCoalescer]" = weakref.WeakKeyDictionary()
+
 
 class ServerMonitoringService:
     """服务器监控服务，处理服务器变更时的监控配置同步"""
@@ -25,25 +67,48 @@ class ServerMonitoringService:
             settings.GRAFANA_API_KEY
         )
     
+    @staticmethod
+    async def _iter_monitored_targets(db: AsyncSession) -> AsyncIterator[Sequence[Row]]:
+        """流式查询启用监控的服务器（仅生成监控目标所需的列），按分区返回，内存中最多只保留一个分区的行"""
+        stmt = select(*_TARGET_COLUMNS).where(Server.monitoring_enabled == True).execution_options(yield_per=_STREAM_YIELD_PER)
+        result = await db.stream(stmt)
+        async for rows in result.partitions():
+            yield rows
+    
+    async def _sync_targets(self) -> bool:
+        """
+        请求同步Prometheus目标配置
+        并发的多次请求合并执行，只查询一次数据库并写一次配置文件，请求方共享同一同步结果
+        """
+        loop = asyncio.get_running_loop()
+        coalescer = _sync_coalescers.get(loop)
+        if coalescer is None:
+            coalescer = _sync_coalescers[loop] = _TargetSyncCoalescer()
+        return await coalescer.request(self._sync_now)
+    
+    async def _sync_now(self) -> bool:
+        """查询当前启用监控的服务器并同步Prometheus目标配置"""
+        # 同步可能在请求方的会话关闭后才执行，使用独立会话查询；调用方均在提交后才请求同步
+        targets = []
+        async with AsyncSessionLocal() as session:
+            async for rows in self._iter_monitored_targets(session):
+                targets.extend(PrometheusConfigManager.build_ipmi_target(*row) for row in rows)
+        return await self.prometheus_manager.sync_ipmi_targets(targets)
+    
     async def on_server_added(self, server: Server) -> bool:
         """服务器添加时的监控配置处理"""
         try:
             # 1. 如果启用了监控，创建openshub用户
             if bool(server.monitoring_enabled):
                 await self.ipmi_service.ensure_openshub_user(
-                    ip=str(server.ipmi_ip) if server.ipmi_ip is not None else "",
-                    admin_username=str(server.ipmi_username) if server.ipmi_username is not None else "",
-                    admin_password=str(server.ipmi_password) if server.ipmi_password is not None else "",
-                    port=int(str(server.ipmi_port)) if server.ipmi_port is not None else settings.IPMI_DEFAULT_PORT
+                    ip=server.ipmi_ip or "",
+                    admin_username=server.ipmi_username or "",
+                    admin_password=server.ipmi_password or "",
+                    port=server.ipmi_port or settings.IPMI_DEFAULT_PORT
                 )
             
             # 2. 同步Prometheus目标配置（仅包含启用监控的服务器）
-            # [修改点 2] 使用异步查询语法
-            stmt = select(Server).where(Server.monitoring_enabled == True)
-            result = await self.db.execute(stmt)
-            servers = result.scalars().all()
-            
-            await self.prometheus_manager.sync_ipmi_targets(servers)
+            await self._sync_targets()
             
             logger.info(f"服务器 {server.id} 监控配置已更新")
             return True
@@ -54,16 +119,8 @@ class ServerMonitoringService:
     async def on_server_deleted(self, server_id: int) -> bool:
         """服务器删除时的监控配置处理"""
         try:
-            # 1. 同步Prometheus目标配置（排除已删除的服务器）
-            # [修改点 3] 使用异步查询语法
-            stmt = select(Server).where(
-                Server.monitoring_enabled == True,
-                Server.id != server_id
-            )
-            result = await self.db.execute(stmt)
-            servers = result.scalars().all()
-            
-            await self.prometheus_manager.sync_ipmi_targets(servers)
+            # 1. 同步Prometheus目标配置（服务器已在删除提交后才请求同步，查询结果中不再包含它）
+            await self._sync_targets()
             
             logger.info(f"服务器 {server_id} 监控配置已清理")
             return True
@@ -78,22 +135,52 @@ class ServerMonitoringService:
             if not original_monitoring_enabled and bool(server.monitoring_enabled):
                 # 创建openshub用户
                 await self.ipmi_service.ensure_openshub_user(
-                    ip=str(server.ipmi_ip) if server.ipmi_ip is not None else "",
-                    admin_username=str(server.ipmi_username) if server.ipmi_username is not None else "",
-                    admin_password=str(server.ipmi_password) if server.ipmi_password is not None else "",
-                    port=int(str(server.ipmi_port)) if server.ipmi_port is not None else settings.IPMI_DEFAULT_PORT
+                    ip=server.ipmi_ip or "",
+                    admin_username=server.ipmi_username or "",
+                    admin_password=server.ipmi_password or "",
+                    port=server.ipmi_port or settings.IPMI_DEFAULT_PORT
                 )
             
             # 如果监控状态发生变化，则同步配置
-            # [修改点 4] 使用异步查询语法
-            stmt = select(Server).where(Server.monitoring_enabled == True)
-            result = await self.db.execute(stmt)
-            servers = result.scalars().all()
-            
-            await self.prometheus_manager.sync_ipmi_targets(servers)
+            await self._sync_targets()
             
             logger.info(f"服务器 {server.id} 监控配置已同步")
             return True
         except Exception as e:
             logger.error(f"服务器 {server.id} 监控配置同步失败: {e}")
+            return False
+
+    async def on_servers_updated(self, servers: List[Server], original_states: Dict[int, bool]) -> bool:
+        """
+        批量更新服务器监控状态后的监控配置处理
+        新启用监控的服务器并发创建openshub用户（有并发上限），最后只同步一次Prometheus目标配置
+        """
+        try:
+            newly_enabled = [
+                server for server in servers
+                if not original_states.get(server.id) and bool(server.monitoring_enabled)
+            ]
+            if newly_enabled:
+                semaphore = asyncio.Semaphore(settings.IPMI_CONCURRENT_LIMIT)
+
+                async def ensure_user(server: Server):
+                    async with semaphore:
+                        return await self.ipmi_service.ensure_openshub_user(
+                            ip=server.ipmi_ip or "",
+                            admin_username=server.ipmi_username or "",
+                            admin_password=server.ipmi_password or "",
+                            port=server.ipmi_port or settings.IPMI_DEFAULT_PORT
+                        )
+
+                results = await asyncio.gather(*(ensure_user(s) for s in newly_enabled), return_exceptions=True)
+                for server, result in zip(newly_enabled, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"服务器 {server.id} 创建openshub用户失败: {result}")
+
+            await self._sync_targets()
+
+            logger.info(f"{len(servers)} 台服务器的监控配置已同步")
+            return True
+        except Exception as e:
+            logger.error(f"批量同步服务器监控配置失败: {e}")
             return False
\ No newline at end of file
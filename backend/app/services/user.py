@@ -1,6 +1,6 @@
 import asyncio
 from typing import Optional, List, Union
-from sqlalchemy import select
+from sqlalchemy import select, exists
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User, UserRole
@@ -26,11 +26,11 @@ class UserService:
     async def create_user(self, user_data: UserCreate) -> User:
         """创建用户（异步版本）"""
         # 检查用户名是否已存在
-        if await self.get_user_by_username_async(user_data.username):
+        if await self._username_exists(user_data.username):
             raise ValidationError("用户名已存在")
         
         # 检查邮箱是否已存在
-        if await self.get_user_by_email(user_data.email):
+        if await self._email_exists(user_data.email):
             raise ValidationError("邮箱已存在")
         
         # 创建用户
@@ -84,9 +84,7 @@ class UserService:
 
     async def get_user(self, user_id: int) -> Optional[User]:
         """根据ID获取用户"""
-        stmt = select(User).where(User.id == user_id)
-        result = await self.db.execute(stmt)
-        return result.scalar_one_or_none()
+        return await self.db.get(User, user_id)
 
     def get_user_by_username(self, username: str) -> Optional[User]:
         """根据用户名获取用户（同步版本）"""
@@ -104,6 +102,16 @@ class UserService:
         result = await self.db.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def _username_exists(self, username: str) -> bool:
+        """用户名是否已被占用（EXISTS 查询，不加载用户行）"""
+        result = await self.db.execute(select(exists().where(User.username == username)))
+        return bool(result.scalar())
+
+    async def _email_exists(self, email: str) -> bool:
+        """邮箱是否已被占用（EXISTS 查询，不加载用户行）"""
+        result = await self.db.execute(select(exists().where(User.email == email)))
+        return bool(result.scalar())
+
     async def get_user_by_email(self, email: str) -> Optional[User]:
         """根据邮箱获取用户"""
         stmt = select(User).where(User.email == email)
@@ -133,11 +141,11 @@ class UserService:
         
         # 检查用户名和邮箱唯一性
         if "username" in update_data and update_data["username"] != db_user.username:
-            if await self.get_user_by_username(update_data["username"]):
+            if await self._username_exists(update_data["username"]):
                 raise ValidationError("用户名已存在")
         
         if "email" in update_data and update_data["email"] != db_user.email:
-            if await self.get_user_by_email(update_data["email"]):
+            if await self._email_exists(update_data["email"]):
                 raise ValidationError("邮箱已存在")
         
         # 更新用户信息
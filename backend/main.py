@@ -133,6 +133,27 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"停止离线服务器检查服务失败: {e}")
     
+    # 关闭共享的 Redfish HTTP 客户端
+    try:
+        from app.services.ipmi import IPMIService
+        await IPMIService.aclose_http_client()
+    except Exception as e:
+        logger.error(f"关闭Redfish HTTP客户端失败: {e}")
+    
+    # 关闭常驻的IPMI轮询进程池，其子进程不会自行退出
+    try:
+        from app.services.ipmi import IPMIService
+        IPMIService.shutdown_poll_pool()
+    except Exception as e:
+        logger.error(f"关闭IPMI轮询进程池失败: {e}")
+    
+    # 关闭共享的 Prometheus/Grafana HTTP 客户端
+    try:
+        from app.services import server_monitoring
+        await server_monitoring.aclose_http_client()
+    except Exception as e:
+        logger.error(f"关闭Prometheus/Grafana HTTP客户端失败: {e}")
+    
     # 停止数据库健康检查任务
     if health_check_task:
         health_check_task.cancel()
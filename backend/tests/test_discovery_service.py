@@ -0,0 +1,51 @@
+"""
+测试设备发现服务的数据库相关行为
+"""
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, Server
+from app.services import discovery
+from app.services.discovery import DiscoveryService
+
+
+@pytest_asyncio.fixture
+async def async_db():
+    """内存SQLite数据库上的异步会话，表结构按模型创建"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Server.__table__), [
+            {"name": f"server-{i}", "ipmi_ip": f"10.0.0.{i}", "ipmi_username": "admin", "ipmi_password": "secret"}
+            for i in range(1, 6)
+        ])
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_get_existing_ips_and_names_queries_in_chunks(async_db, monkeypatch):
+    """IP和名称分批查询，合并各批结果"""
+    chunk_sizes = []
+    chunked = discovery._chunked
+
+    def recording_chunked(items):
+        for chunk in chunked(items, 2):
+            chunk_sizes.append(len(chunk))
+            yield chunk
+
+    monkeypatch.setattr(discovery, "_chunked", recording_chunked)
+    service = DiscoveryService(async_db)
+
+    existing_ips, existing_names = await service._get_existing_ips_and_names(
+        [f"10.0.0.{i}" for i in range(3, 9)],
+        ["server-1", "server-5", "new-server"],
+    )
+
+    assert existing_ips == {"10.0.0.3", "10.0.0.4", "10.0.0.5"}
+    assert existing_names == {"server-1", "server-5"}
+    assert max(chunk_sizes) == 2
@@ -0,0 +1,103 @@
+"""
+测试常驻轮询进程池的排队与超时行为
+"""
+import asyncio
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.exceptions import IPMIError
+from app.services import ipmi
+from app.services.ipmi import IPMIService
+
+
+def _sleep_then_ok(seconds):
+    """模拟一次耗时的轮询任务"""
+    time.sleep(seconds)
+    return {"status": "success", "data": seconds}
+
+
+class _FakeConnection:
+    """模拟缓存的IPMI会话，get_power 耗时 delay 秒"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def get_power(self):
+        time.sleep(self.delay)
+        return {"powerstate": "on"}
+
+
+@pytest.fixture
+def single_worker_poll_pool():
+    """用单线程执行器代替常驻轮询进程池，便于观察排队行为"""
+    previous = IPMIService._poll_pool, IPMIService._poll_slots
+    IPMIService._poll_pool = ThreadPoolExecutor(max_workers=1)
+    IPMIService._poll_slots = asyncio.Semaphore(1)
+    yield
+    IPMIService._poll_pool.shutdown(wait=True)
+    IPMIService._poll_pool, IPMIService._poll_slots = previous
+
+
+@pytest.mark.asyncio
+async def test_queued_poll_jobs_do_not_time_out(single_worker_poll_pool):
+    """两个任务各需0.3秒，只有一个子进程时依次执行，排队时间不计入0.5秒超时"""
+    service = IPMIService()
+    results = await asyncio.gather(
+        service._run_in_poll_pool(_sleep_then_ok, 0.3, timeout=0.5),
+        service._run_in_poll_pool(_sleep_then_ok, 0.3, timeout=0.5),
+    )
+    assert results == [0.3, 0.3]
+
+
+@pytest.mark.asyncio
+async def test_timed_out_poll_job_keeps_slot_until_finished(single_worker_poll_pool):
+    """超时的任务仍占用子进程，名额在任务真正结束后才释放，后续任务的超时从开始执行时计算"""
+    service = IPMIService()
+    with pytest.raises(IPMIError):
+        await service._run_in_poll_pool(_sleep_then_ok, 0.6, timeout=0.2)
+    assert IPMIService._poll_slots.locked()
+
+    assert await service._run_in_poll_pool(_sleep_then_ok, 0.1, timeout=0.3) == 0.1
+    assert not IPMIService._poll_slots.locked()
+
+
+def test_close_keeps_shared_poll_pool():
+    """单个实例关闭时不影响其他实例共享的轮询进程池"""
+    service = IPMIService()
+    other = IPMIService()
+    pool = IPMIService._poll_pool
+
+    service.close()
+    assert IPMIService._poll_pool is pool
+    assert other._poll_pool is pool
+
+
+def test_shutdown_poll_pool_recreates_on_next_use():
+    """应用关闭时关闭常驻轮询进程池，之后新建的服务实例会重新创建"""
+    IPMIService()
+    IPMIService.shutdown_poll_pool()
+    assert IPMIService._poll_pool is None
+    assert IPMIService._poll_slots is None
+
+    IPMIService()
+    assert IPMIService._poll_pool is not None
+    IPMIService.shutdown_poll_pool()
+
+
+@pytest.mark.skipif(not hasattr(signal, "setitimer"), reason="需要 SIGALRM 支持")
+def test_bulk_poll_times_out_hosts_individually(monkeypatch):
+    """同一批次中一台BMC无响应只导致该主机超时，其余主机正常返回"""
+    delays = {"10.0.0.1": 0, "10.0.0.2": 5, "10.0.0.3": 0}
+    monkeypatch.setattr(ipmi, "_mp_get_cached_connection", lambda ip, *args: _FakeConnection(delays[ip]))
+
+    start = time.monotonic()
+    result = ipmi._mp_get_power_bulk(list(delays), "admin", "secret", 623, 0.2)
+
+    assert result == {
+        "status": "success",
+        "data": {"10.0.0.1": "on", "10.0.0.2": "unknown", "10.0.0.3": "on"},
+    }
+    assert time.monotonic() - start < 1
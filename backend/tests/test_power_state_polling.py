@@ -0,0 +1,224 @@
+"""
+测试定时电源状态刷新的分桶轮询和批量写入
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.models import Base, Server
+from app.models.server import PowerState, ServerStatus
+from app.services import scheduler_service as scheduler_module
+from app.services import server as server_module
+from app.services.scheduler_service import PowerStateSchedulerService, _PollTarget, _PowerStateUpdate, invalidate_credentials
+
+
+class _FakeIPMIService:
+    """模拟IPMI服务：unreachable 中的BMC探测失败，其余按 states 返回电源状态，delays 中的BMC查询耗时对应秒数"""
+
+    def __init__(self, unreachable=(), states=None, delays=None):
+        self.unreachable = set(unreachable)
+        self.states = states or {}
+        self.delays = delays or {}
+        self.bulk_calls = []
+
+    async def ping_bmc(self, ip, port=623, timeout=None):
+        return ip not in self.unreachable
+
+    async def get_power_states_bulk(self, ips, username, password, port=623):
+        self.bulk_calls.append((sorted(ips), username))
+        await asyncio.sleep(max((self.delays.get(ip, 0) for ip in ips), default=0))
+        return {ip: self.states.get(ip, "unknown") for ip in ips}
+
+
+@pytest_asyncio.fixture
+async def db_engine(monkeypatch):
+    """内存SQLite数据库，替换刷新服务使用的引擎和会话工厂"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    monkeypatch.setattr(scheduler_module, "async_engine", engine)
+    monkeypatch.setattr(scheduler_module, "AsyncSessionLocal", async_sessionmaker(engine, expire_on_commit=False))
+    invalidate_credentials()
+    yield engine
+    invalidate_credentials()
+    await engine.dispose()
+
+
+async def _insert_servers(engine, rows):
+    async with engine.begin() as conn:
+        await conn.execute(insert(Server.__table__), [
+            {"ipmi_password": "secret", "ipmi_port": 623, **row} for row in rows
+        ])
+
+
+async def _states(engine):
+    async with engine.connect() as conn:
+        result = await conn.execute(select(Server.id, Server.status, Server.power_state).order_by(Server.id))
+        return {row.id: (row.status, row.power_state) for row in result}
+
+
+def _status_row(server_id):
+    return SimpleNamespace(id=server_id, status=ServerStatus.ONLINE, power_state=PowerState.ON)
+
+
+def _target(server_id, username="admin", password="secret", port=623):
+    return _PollTarget(server_id, f"10.0.0.{server_id}", username, password, port, ServerStatus.ONLINE, PowerState.ON)
+
+
+def test_group_by_credentials_splits_buckets(monkeypatch):
+    """按凭据分桶，每桶不超过 IPMI_BULK_POLL_SIZE 台"""
+    monkeypatch.setattr(settings, "IPMI_BULK_POLL_SIZE", 2)
+    targets = [_target(i) for i in range(1, 6)] + [_target(6, username="root")]
+
+    buckets = PowerStateSchedulerService._group_by_credentials(targets)
+
+    assert [[row.id for row in bucket] for bucket in buckets] == [[1, 2], [3, 4], [5], [6]]
+
+
+@pytest.mark.asyncio
+async def test_refresh_all_power_states_polls_buckets_and_flushes_changes(db_engine, monkeypatch):
+    """只轮询在线服务器，同一凭据的主机批量查询，探测失败和查询失败的主机标记为离线，结果一次写入"""
+    monkeypatch.setattr(settings, "IPMI_BULK_POLL_SIZE", 2)
+    await _insert_servers(db_engine, [
+        {"id": 1, "name": "s1", "ipmi_ip": "10.0.0.1", "ipmi_username": "admin",
+         "status": ServerStatus.ONLINE, "power_state": PowerState.OFF},
+        {"id": 2, "name": "s2", "ipmi_ip": "10.0.0.2", "ipmi_username": "admin",
+         "status": ServerStatus.ONLINE, "power_state": PowerState.ON},
+        {"id": 3, "name": "s3", "ipmi_ip": "10.0.0.3", "ipmi_username": "root",
+         "status": ServerStatus.ONLINE, "power_state": PowerState.ON},
+        {"id": 4, "name": "s4", "ipmi_ip": "10.0.0.4", "ipmi_username": "admin",
+         "status": ServerStatus.ONLINE, "power_state": PowerState.ON},
+        {"id": 5, "name": "s5", "ipmi_ip": "10.0.0.5", "ipmi_username": "admin",
+         "status": ServerStatus.OFFLINE, "power_state": PowerState.UNKNOWN},
+    ])
+    fake_ipmi = _FakeIPMIService(
+        unreachable={"10.0.0.3"},
+        states={"10.0.0.1": "on", "10.0.0.2": "on"},
+    )
+    service = PowerStateSchedulerService()
+    service.ipmi_service = fake_ipmi
+
+    await service.refresh_all_power_states()
+
+    assert sorted(fake_ipmi.bulk_calls) == [
+        (["10.0.0.1", "10.0.0.2"], "admin"),
+        (["10.0.0.4"], "admin"),
+    ]
+    assert await _states(db_engine) == {
+        1: (ServerStatus.ONLINE, PowerState.ON),
+        2: (ServerStatus.ONLINE, PowerState.ON),
+        3: (ServerStatus.OFFLINE, PowerState.UNKNOWN),
+        4: (ServerStatus.OFFLINE, PowerState.UNKNOWN),
+        5: (ServerStatus.OFFLINE, PowerState.UNKNOWN),
+    }
+
+
+@pytest.mark.asyncio
+async def test_refresh_all_power_states_keeps_completed_results_on_timeout(db_engine, monkeypatch):
+    """整体超时时已完成的桶结果仍写入数据库，只有未完成的服务器保持原状态"""
+    monkeypatch.setattr(settings, "IPMI_BULK_POLL_SIZE", 1)
+    monkeypatch.setattr(settings, "IPMI_POWER_STATE_TIMEOUT", 0.05)
+    monkeypatch.setattr(settings, "SERVER_ONLINE_CHECK_TIMEOUT", 0.01)
+    await _insert_servers(db_engine, [
+        {"id": 1, "name": "s1", "ipmi_ip": "10.0.0.1", "ipmi_username": "admin",
+         "status": ServerStatus.ONLINE, "power_state": PowerState.OFF},
+        {"id": 2, "name": "s2", "ipmi_ip": "10.0.0.2", "ipmi_username": "admin",
+         "status": ServerStatus.ONLINE, "power_state": PowerState.OFF},
+    ])
+    fake_ipmi = _FakeIPMIService(states={"10.0.0.1": "on", "10.0.0.2": "on"}, delays={"10.0.0.2": 10})
+    service = PowerStateSchedulerService()
+    service.ipmi_service = fake_ipmi
+    service._ipmi_concurrency_limit = 1  # 单个工作协程依次处理两个桶
+
+    await asyncio.wait_for(service.refresh_all_power_states(), timeout=5)
+
+    assert len(fake_ipmi.bulk_calls) == 2
+    assert await _states(db_engine) == {
+        1: (ServerStatus.ONLINE, PowerState.ON),
+        2: (ServerStatus.ONLINE, PowerState.OFF),
+    }
+
+
+@pytest.mark.asyncio
+async def test_poll_server_bucket_marks_unchanged_rows(db_engine):
+    """与数据库现有状态相同的结果标记为未变化，不参与写入"""
+    fake_ipmi = _FakeIPMIService(states={"10.0.0.1": "on", "10.0.0.2": "off"})
+    service = PowerStateSchedulerService()
+    service.ipmi_service = fake_ipmi
+
+    updates = await service._poll_server_bucket([_target(1), _target(2)])
+
+    assert {u.id: (u.status, u.power_state, u.changed) for u in updates} == {
+        1: (ServerStatus.ONLINE, PowerState.ON, False),
+        2: (ServerStatus.ONLINE, PowerState.OFF, True),
+    }
+
+
+@pytest.mark.asyncio
+async def test_attach_credentials_skips_cache_when_invalidated_during_query(db_engine, monkeypatch):
+    """查询连接信息期间缓存被清除时，本轮使用查询结果但不写入缓存"""
+    await _insert_servers(db_engine, [{"id": 1, "name": "s1", "ipmi_ip": "10.0.0.1", "ipmi_username": "admin"}])
+    session_factory = scheduler_module.AsyncSessionLocal
+
+    def racing_session_factory():
+        invalidate_credentials(1)  # 模拟查询期间其他请求修改了连接信息
+        return session_factory()
+
+    monkeypatch.setattr(scheduler_module, "AsyncSessionLocal", racing_session_factory)
+    service = PowerStateSchedulerService()
+
+    targets = await service._attach_credentials([_status_row(1)])
+
+    assert [row.ipmi_ip for row in targets] == ["10.0.0.1"]
+    assert 1 not in scheduler_module._credential_cache
+
+
+@pytest.mark.asyncio
+async def test_attach_credentials_rereads_expired_entries(db_engine, monkeypatch):
+    """缓存条目过期后重新从数据库读取连接信息"""
+    await _insert_servers(db_engine, [{"id": 1, "name": "s1", "ipmi_ip": "10.0.0.1", "ipmi_username": "admin"}])
+    monkeypatch.setattr(settings, "SCHEDULER_CREDENTIAL_CACHE_TTL", 0)
+    service = PowerStateSchedulerService()
+    await service._attach_credentials([_status_row(1)])
+
+    async with db_engine.begin() as conn:
+        await conn.execute(Server.__table__.update().values(ipmi_username="root"))
+    targets = await service._attach_credentials([_status_row(1)])
+
+    assert [row.ipmi_username for row in targets] == ["root"]
+
+
+@pytest.mark.asyncio
+async def test_failed_poll_evicts_cached_credentials(db_engine):
+    """BMC有响应但查询失败时移除缓存的连接信息，查询成功时保留"""
+    await _insert_servers(db_engine, [
+        {"id": 1, "name": "s1", "ipmi_ip": "10.0.0.1", "ipmi_username": "admin"},
+        {"id": 2, "name": "s2", "ipmi_ip": "10.0.0.2", "ipmi_username": "admin"},
+    ])
+    service = PowerStateSchedulerService()
+    service.ipmi_service = _FakeIPMIService(states={"10.0.0.1": "on"})
+    targets = await service._attach_credentials([_status_row(1), _status_row(2)])
+
+    await service._poll_server_bucket(targets)
+
+    assert 1 in scheduler_module._credential_cache
+    assert 2 not in scheduler_module._credential_cache
+
+
+@pytest.mark.asyncio
+async def test_flush_power_states_clears_cluster_statistics_cache(db_engine):
+    """写入电源状态变化后清除集群统计缓存"""
+    await _insert_servers(db_engine, [{"id": 1, "name": "s1", "ipmi_ip": "10.0.0.1", "ipmi_username": "admin"}])
+    server_module._stats_cache[(True, None)] = (float("inf"), {"total_servers": 1})
+    service = PowerStateSchedulerService()
+
+    assert await service._flush_power_states([_PowerStateUpdate(1, ServerStatus.ONLINE, PowerState.ON)])
+
+    assert not server_module._stats_cache
+    assert (await _states(db_engine))[1] == (ServerStatus.ONLINE, PowerState.ON)
@@ -0,0 +1,99 @@
+"""
+测试Prometheus目标同步请求的合并行为
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, Server
+from app.services import server_monitoring_service as monitoring_module
+from app.services.server_monitoring_service import ServerMonitoringService, _TargetSyncCoalescer
+
+
+class _CountingSync:
+    """记录调用次数的同步函数，每次同步耗时 delay 秒"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self) -> bool:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return True
+
+
+@pytest.mark.asyncio
+async def test_single_request_syncs_immediately():
+    """没有同步在执行时，请求立即同步，不等待合并窗口"""
+    coalescer = _TargetSyncCoalescer()
+    sync = _CountingSync(delay=0)
+
+    assert await asyncio.wait_for(coalescer.request(sync), timeout=0.05) is True
+    assert sync.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_sync():
+    """同步执行期间到达的多个请求共享其后的同一次同步"""
+    coalescer = _TargetSyncCoalescer()
+    sync = _CountingSync()
+
+    first = asyncio.create_task(coalescer.request(sync))
+    await asyncio.sleep(0)  # 第一次同步开始执行
+    results = await asyncio.gather(first, *(coalescer.request(sync) for _ in range(10)))
+
+    assert all(results)
+    assert sync.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_request_after_sync_finished_starts_new_sync():
+    """上一次同步结束后的请求开始新的同步，而不是复用已完成的结果"""
+    coalescer = _TargetSyncCoalescer()
+    sync = _CountingSync(delay=0)
+
+    await coalescer.request(sync)
+    await coalescer.request(sync)
+
+    assert sync.calls == 2
+
+
+class _RecordingPrometheusManager:
+    """记录同步目标的Prometheus配置管理器"""
+
+    def __init__(self):
+        self.synced = []
+
+    async def sync_ipmi_targets(self, targets):
+        self.synced.append(targets)
+        return True
+
+
+@pytest.mark.asyncio
+async def test_sync_now_streams_monitored_servers_into_targets(monkeypatch):
+    """分区流式读取启用监控的服务器，跨分区生成全部监控目标"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Server.__table__), [
+            {"name": f"s{i}", "ipmi_ip": f"10.0.0.{i}", "ipmi_username": "admin", "ipmi_password": "secret",
+             "monitoring_enabled": i != 3}
+            for i in range(1, 6)
+        ])
+    monkeypatch.setattr(monitoring_module, "AsyncSessionLocal", async_sessionmaker(engine, expire_on_commit=False))
+    monkeypatch.setattr(monitoring_module, "_STREAM_YIELD_PER", 2)
+    service = ServerMonitoringService.__new__(ServerMonitoringService)
+    service.prometheus_manager = _RecordingPrometheusManager()
+
+    try:
+        assert await service._sync_now() is True
+    finally:
+        await engine.dispose()
+
+    [targets] = service.prometheus_manager.synced
+    assert sorted(t["labels"]["ipmi_ip"] for t in targets) == ["10.0.0.1", "10.0.0.2", "10.0.0.4", "10.0.0.5"]
+    assert targets[0]["labels"]["__param_target"] == "10.0.0.1"
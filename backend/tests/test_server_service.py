@@ -0,0 +1,161 @@
+"""
+测试服务器服务的数据库相关行为
+"""
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.exceptions import ValidationError
+from app.models import Base, Server, ServerGroup
+from app.schemas.server import ServerCreate
+from app.services.server import ServerService, invalidate_cluster_statistics
+
+
+@pytest_asyncio.fixture
+async def async_db():
+    """内存SQLite数据库上的异步会话，表结构按模型创建"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+def _server_create(index: int, **overrides) -> ServerCreate:
+    """构造第 index 台测试服务器的创建数据"""
+    data = {
+        "name": f"server-{index}",
+        "ipmi_ip": f"10.0.0.{index}",
+        "ipmi_username": "admin",
+        "ipmi_password": "secret",
+    }
+    data.update(overrides)
+    return ServerCreate(**data)
+
+
+async def _count_servers(session) -> int:
+    return (await session.execute(select(func.count(Server.id)))).scalar_one()
+
+
+def _integrity_error(message: str) -> IntegrityError:
+    """构造驱动错误信息为 message 的完整性错误"""
+    return IntegrityError("INSERT INTO servers ...", {}, Exception(message))
+
+
+@pytest.mark.parametrize("message, expected", [
+    # SQLite
+    ("UNIQUE constraint failed: servers.name", "服务器名称已存在"),
+    ("UNIQUE constraint failed: servers.ipmi_ip", "IPMI IP地址已存在"),
+    # PostgreSQL
+    ('duplicate key value violates unique constraint "ix_servers_name"', "服务器名称已存在"),
+    ('duplicate key value violates unique constraint "ix_servers_ipmi_ip"', "IPMI IP地址已存在"),
+    # MySQL
+    ("(1062, \"Duplicate entry 'web-01' for key 'servers.ix_servers_name'\")", "服务器名称已存在"),
+    ("(1062, \"Duplicate entry '10.0.0.1' for key 'ix_servers_ipmi_ip'\")", "IPMI IP地址已存在"),
+])
+def test_unique_violation_maps_to_field(message, expected):
+    """名称/IPMI IP唯一约束冲突按索引名转换为对应的验证错误"""
+    error = ServerService._unique_violation_error(_integrity_error(message))
+    assert isinstance(error, ValidationError)
+    assert error.message == expected
+
+
+@pytest.mark.parametrize("message", [
+    "NOT NULL constraint failed: servers.name",
+    "FOREIGN KEY constraint failed",
+    'insert or update on table "servers" violates foreign key constraint "servers_group_id_fkey"',
+    'null value in column "name" of relation "servers" violates not-null constraint',
+])
+def test_other_integrity_errors_are_not_mapped(message):
+    """非唯一约束的完整性错误（即使信息中包含列名）原样返回"""
+    original = _integrity_error(message)
+    assert ServerService._unique_violation_error(original) is original
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("executemany_returning", [True, False])
+async def test_bulk_create_servers_inserts_all(async_db, monkeypatch, executemany_returning):
+    """批量创建的服务器全部写入并带回主键，不支持批量 RETURNING 的数据库走工作单元写入"""
+    service = ServerService(async_db)
+    monkeypatch.setattr(service, "_dialect_supports", lambda feature: executemany_returning)
+
+    servers = await service.bulk_create_servers([_server_create(i) for i in range(1, 4)])
+
+    assert [server.name for server in servers] == ["server-1", "server-2", "server-3"]
+    assert all(server.id is not None for server in servers)
+    assert await _count_servers(async_db) == 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_servers_rolls_back_on_duplicate(async_db):
+    """任一条违反唯一约束时整批回滚，并报告冲突的字段"""
+    service = ServerService(async_db)
+    await service.bulk_create_servers([_server_create(1)])
+
+    with pytest.raises(ValidationError) as exc_info:
+        await service.bulk_create_servers([
+            _server_create(2),
+            _server_create(3, ipmi_ip="10.0.0.1"),
+        ])
+
+    assert exc_info.value.message == "IPMI IP地址已存在"
+    assert await _count_servers(async_db) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_servers_after_async_pages_by_id(async_db):
+    """按ID游标逐页读取，覆盖全部服务器且不重复"""
+    service = ServerService(async_db)
+    created = await service.bulk_create_servers([_server_create(i) for i in range(1, 6)])
+
+    seen, last_id = [], 0
+    while True:
+        page = await service.get_servers_after_async(last_id, limit=2)
+        if not page:
+            break
+        assert len(page) <= 2
+        seen.extend(row.id for row in page)
+        last_id = page[-1].id
+
+    assert seen == sorted(server.id for server in created)
+
+
+@pytest.mark.asyncio
+async def test_get_servers_after_async_filters_by_group(async_db):
+    """指定分组时只返回该分组内ID大于游标的服务器"""
+    group = ServerGroup(name="rack-a")
+    async_db.add(group)
+    await async_db.commit()
+    service = ServerService(async_db)
+    created = await service.bulk_create_servers([
+        _server_create(1, group_id=group.id),
+        _server_create(2),
+        _server_create(3, group_id=group.id),
+        _server_create(4, group_id=group.id),
+    ])
+    grouped_ids = [server.id for server in created if server.group_id == group.id]
+
+    page = await service.get_servers_after_async(grouped_ids[0], limit=10, group_id=group.id)
+
+    assert [row.id for row in page] == grouped_ids[1:]
+
+
+@pytest.mark.asyncio
+async def test_cached_cluster_statistics_are_copies(async_db):
+    """调用方修改返回的统计结果不影响缓存"""
+    invalidate_cluster_statistics()
+    service = ServerService(async_db)
+    await service.bulk_create_servers([_server_create(1)])
+
+    first = await service.get_cluster_statistics_async()
+    first['total_servers'] = 100
+    first['manufacturer_stats']['tampered'] = 1
+    second = await service.get_cluster_statistics_async()
+    invalidate_cluster_statistics()
+
+    assert second['total_servers'] == 1
+    assert 'tampered' not in second['manufacturer_stats']